@@ -1,6 +1,7 @@
-from database import Base, engine
+from database import Base, engine, create_views
 
 print("Creating database tables...")
 Base.metadata.drop_all(bind=engine)  # Drop all existing tables
 Base.metadata.create_all(bind=engine)  # Create new tables
+create_views(engine)  # Recreate candles_h1 and other derived views
 print("Database tables created successfully!") 
\ No newline at end of file
@@ -1,7 +1,13 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.orm import declarative_base, sessionmaker
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import time
+import logging
+from functools import lru_cache
 from dotenv import load_dotenv
 from datetime import datetime
 
@@ -14,9 +20,48 @@ OANDA_API_URL = os.getenv("OANDA_API_URL")
 OANDA_API_KEY = os.getenv("OANDA_API_KEY")
 OANDA_ACCOUNT_ID = os.getenv("OANDA_ACCOUNT_ID")
 
+def create_oanda_session(api_key=OANDA_API_KEY):
+    """Create a keep-alive HTTP session for OANDA with pooled connections and retries"""
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {api_key}"})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.2)
+    ))
+    return session
+
+# Shared session so repeated OANDA calls reuse the TCP/TLS connection
+_oanda = create_oanda_session()
+
 # Database setup (SQLite for now)
 DATABASE_URL = "sqlite:///./database.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+# Connection pool sizing (override via environment for heavier deployments)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_use_lifo=True  # Reuse the most recently returned connection first
+)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent reads and bulk writes"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, no fsync per commit
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped I/O
+    cursor.close()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -32,26 +77,86 @@ class Trade(Base):
     price = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-# Create tables if they don't exist
+    __table_args__ = (
+        Index("ix_trades_symbol_created_at", "symbol", "created_at"),
+    )
+
+# Hourly OHLCV bars aggregated from the trades table inside SQLite; created_at
+# is naive UTC, so buckets are labelled in the same RFC 3339 UTC form as the
+# /historical timestamps
+CANDLES_H1_VIEW = """
+CREATE VIEW candles_h1 AS
+SELECT symbol, ts, MIN(o) AS open, MAX(price) AS high, MIN(price) AS low,
+       MIN(c) AS close, SUM(amount) AS volume
+FROM (
+    SELECT symbol, price, amount,
+           strftime('%Y-%m-%dT%H:00:00Z', created_at) AS ts,
+           first_value(price) OVER w AS o,
+           last_value(price) OVER w AS c
+    FROM trades
+    WINDOW w AS (
+        PARTITION BY symbol, strftime('%Y-%m-%dT%H:00:00Z', created_at)
+        ORDER BY created_at, id
+        ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+    )
+)
+GROUP BY symbol, ts
+"""
+
+def create_views(bind=engine):
+    """Create the SQL views derived from the trades table"""
+    # Recreated on every start, so databases made with an older definition
+    # pick up changes to it
+    with bind.begin() as conn:
+        conn.execute(text("DROP VIEW IF EXISTS candles_h1"))
+        conn.execute(text(CANDLES_H1_VIEW))
+
+# create_all only builds indexes for tables it creates, so indexes added to
+# an existing model are also created here for databases that predate them
+TRADES_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_trades_symbol_created_at ON trades (symbol, created_at)
+"""
+
+def create_indexes(bind=engine):
+    """Create indexes missing from tables that already existed"""
+    with bind.begin() as conn:
+        conn.execute(text(TRADES_INDEXES))
+
+# Create tables, indexes and views if they don't exist
 Base.metadata.create_all(bind=engine)
+create_indexes()
+create_views()
+
+# Prices are reused for this many seconds to collapse bursts of identical lookups
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "1"))
 
 # Fetch Market Price from OANDA
-def fetch_oanda_price(symbol):
+def _fetch_oanda_price_uncached(symbol):
     """Fetches the latest market price from OANDA"""
     oanda_symbol = symbol.replace("/", "_")  # Ensure correct OANDA format
 
     url = f"{OANDA_API_URL}/accounts/{OANDA_ACCOUNT_ID}/pricing?instruments={oanda_symbol}"
-    headers = {"Authorization": f"Bearer {OANDA_API_KEY}"}
-
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        data = response.json()
-        prices = data.get("prices", [])
-        if prices:
-            return float(prices[0]["bids"][0]["price"])  # Return bid price
-        else:
-            return None
-    else:
-        print(f"Error fetching OANDA data: {response.status_code}, {response.text}")
+
+    response = _oanda.get(url, timeout=5)
+
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        logging.error("Error fetching OANDA data: %s, %s", response.status_code, response.text)
         return None
+
+    prices = orjson.loads(response.content).get("prices", [])
+    if prices:
+        return float(prices[0]["bids"][0]["price"])  # Return bid price
+    return None
+
+@lru_cache(maxsize=512)
+def _cached_oanda_price(symbol, bucket):
+    """Memoize one OANDA price per symbol per time bucket"""
+    return _fetch_oanda_price_uncached(symbol)
+
+def fetch_oanda_price(symbol):
+    """Fetches the latest market price from OANDA, cached for PRICE_CACHE_TTL seconds"""
+    if PRICE_CACHE_TTL <= 0:
+        return _fetch_oanda_price_uncached(symbol)
+    return _cached_oanda_price(symbol, int(time.time() // PRICE_CACHE_TTL))
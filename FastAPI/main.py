@@ -1,20 +1,53 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from database import SessionLocal, Trade, fetch_oanda_price
+import httpx
+import numpy as np
+import orjson
 import logging
 from datetime import datetime
-import requests
 import os
 from dotenv import load_dotenv
 
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 OANDA_API_KEY = os.getenv("OANDA_API_KEY")
 OANDA_API_URL = os.getenv("OANDA_API_URL")
 
-logging.basicConfig(level=logging.INFO)
+# Supported OANDA granularities (list keeps the documented order for error messages)
+TIMEFRAMES = ["S5", "S10", "S15", "S30",
+              "M1", "M2", "M4", "M5", "M10", "M15", "M30",
+              "H1", "H2", "H3", "H4", "H6", "H8", "H12",
+              "D", "W", "M"]
+VALID_TIMEFRAMES = frozenset(TIMEFRAMES)
+CANDLES_URL = f"{OANDA_API_URL}/instruments/{{instrument}}/candles"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Per-request messages are debug-level; set LOG_LEVEL=DEBUG to see them
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+
+app = FastAPI(default_response_class=ORJSONResponse)
+
+@app.on_event("startup")
+async def startup():
+    # Shared async client so OANDA round-trips don't block the event loop
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        headers={"Authorization": f"Bearer {OANDA_API_KEY}"},
+        limits=httpx.Limits(max_keepalive_connections=20)
+    )
 
-app = FastAPI()
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.http.aclose()
 
 @app.get("/")
 def home():
@@ -29,7 +62,7 @@ def get_db():
 
 @app.post("/trade/")
 def create_trade(symbol: str, trade_type: str, amount: int, db: Session = Depends(get_db)):
-    print(f"🔹 Received trade request: {symbol}, {trade_type}, {amount}")
+    logging.debug("🔹 Received trade request: %s, %s, %s", symbol, trade_type, amount)
     
     price = fetch_oanda_price(symbol)
     if price is None:
@@ -39,15 +72,55 @@ def create_trade(symbol: str, trade_type: str, amount: int, db: Session = Depend
     db.add(trade)
     db.commit()
     db.refresh(trade)
-    print(f"✅ Trade created: {trade.id}")
+    logging.debug("✅ Trade created: %s", trade.id)
     return trade
 
 @app.get("/trades/")
 def read_trades(db: Session = Depends(get_db)):
     return db.query(Trade).all()
 
+@app.get("/candles/{symbol}")
+def get_candles(symbol: str, start_date: str, end_date: str, db: Session = Depends(get_db)):
+    """Hourly OHLCV bars aggregated from stored trades by the candles_h1 view"""
+    rows = db.execute(text(
+        "SELECT ts, open, high, low, close, volume FROM candles_h1 "
+        "WHERE symbol = :symbol AND ts >= :start AND ts < date(:end, '+1 day') ORDER BY ts"
+    ), {"symbol": symbol, "start": start_date, "end": end_date}).all()
+    
+    # Same column-oriented shape and RFC 3339 UTC timestamps as /historical
+    columns = ["timestamp", "open", "high", "low", "close", "volume"]
+    return dict(zip(columns, map(list, zip(*rows)))) if rows else {c: [] for c in columns}
+
+STREAM_CHUNK_ROWS = 8192  # Values encoded per chunk of the streamed candle payload
+
+def _stream_columns(columns):
+    """Yield a {column: [values]} JSON object in bounded-size chunks"""
+    for i, (name, values) in enumerate(columns.items()):
+        yield (b"{" if i == 0 else b",") + orjson.dumps(name) + b":["
+        for start in range(0, len(values), STREAM_CHUNK_ROWS):
+            # orjson handles both lists and numpy arrays; strip the enclosing brackets
+            chunk = orjson.dumps(values[start:start + STREAM_CHUNK_ROWS], option=orjson.OPT_SERIALIZE_NUMPY)
+            yield (b"," if start else b"") + chunk[1:-1]
+        yield b"]"
+    yield b"}"
+
+def _arrow_response(timestamps, ohlcv):
+    """Encode the candle columns as an Arrow IPC stream"""
+    # OANDA times are RFC 3339 in UTC; drop the trailing Z for numpy's parser
+    times = np.array([t.rstrip("Z") for t in timestamps], dtype="datetime64[ns]")
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(times, type=pa.timestamp("ns", tz="UTC"))] +
+        [pa.array(ohlcv[column]) for column in ohlcv.dtype.names],
+        names=["timestamp"] + list(ohlcv.dtype.names)
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return Response(sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
+
 @app.get("/historical/{symbol}")
 async def get_historical_data(
+    request: Request,
     symbol: str, 
     start_date: str, 
     end_date: str, 
@@ -56,16 +129,12 @@ async def get_historical_data(
 ):
     try:
         # Validate timeframe
-        valid_timeframes = ["S5", "S10", "S15", "S30", 
-                          "M1", "M2", "M4", "M5", "M10", "M15", "M30",
-                          "H1", "H2", "H3", "H4", "H6", "H8", "H12",
-                          "D", "W", "M"]
-        if timeframe not in valid_timeframes:
-            raise HTTPException(status_code=400, detail=f"Invalid timeframe. Must be one of: {valid_timeframes}")
+        if timeframe not in VALID_TIMEFRAMES:
+            raise HTTPException(status_code=400, detail=f"Invalid timeframe. Must be one of: {TIMEFRAMES}")
 
         # Format OANDA API URL
         instrument = symbol.replace("/", "_")
-        url = f"{OANDA_API_URL}/instruments/{instrument}/candles"
+        url = CANDLES_URL.format(instrument=instrument)
         
         params = {
             "from": start_date + "T00:00:00Z",
@@ -74,36 +143,38 @@ async def get_historical_data(
             "price": "MBA"  # Midpoint, Bid, and Ask prices
         }
         
-        headers = {
-            "Authorization": f"Bearer {OANDA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
         # Fetch data from OANDA
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code != 200:
-            logging.error(f"OANDA API Error: {response.text}")
-            raise HTTPException(status_code=response.status_code, 
-                              detail=f"OANDA API Error: {response.text}")
+        response = await request.app.state.http.get(url, params=params)
+        response.raise_for_status()
 
-        candles = response.json().get("candles", [])
+        candles = orjson.loads(response.content).get("candles", [])
+        complete = [candle for candle in candles if candle["complete"]]  # Only use completed candles
         
-        # Transform candles into our format
-        historical_data = []
-        for candle in candles:
-            if candle["complete"]:  # Only use completed candles
-                historical_data.append({
-                    "timestamp": candle["time"],
-                    "open": float(candle["mid"]["o"]),
-                    "high": float(candle["mid"]["h"]),
-                    "low": float(candle["mid"]["l"]),
-                    "close": float(candle["mid"]["c"]),
-                    "volume": candle["volume"]
-                })
-
-        return historical_data
+        # Transform candles into column arrays in one pass (struct-of-arrays)
+        ohlcv = np.fromiter(
+            ((float(c["mid"]["o"]), float(c["mid"]["h"]), float(c["mid"]["l"]),
+              float(c["mid"]["c"]), c["volume"]) for c in complete),
+            dtype=[("open", "f8"), ("high", "f8"), ("low", "f8"), ("close", "f8"), ("volume", "u4")],
+            count=len(complete)
+        )
+        
+        timestamps = [c["time"] for c in complete]
+        if ARROW_AVAILABLE and ARROW_STREAM in request.headers.get("accept", ""):
+            return _arrow_response(timestamps, ohlcv)
+        
+        historical_data = {"timestamp": timestamps}
+        for column in ohlcv.dtype.names:
+            historical_data[column] = np.ascontiguousarray(ohlcv[column])
+
+        # Stream the columns out so serialization overlaps with the network send
+        return StreamingResponse(_stream_columns(historical_data), media_type="application/json")
 
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        logging.error(f"OANDA API Error: {e.response.text}")
+        raise HTTPException(status_code=e.response.status_code,
+                            detail=f"OANDA API Error: {e.response.text}")
     except Exception as e:
         logging.error(f"Error fetching historical data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
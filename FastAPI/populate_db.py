@@ -1,6 +1,7 @@
 from database import SessionLocal, Trade, Base, engine
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+import numpy as np
+import pandas as pd
 
 def populate_historical_data():
     # Create fresh tables
@@ -13,31 +14,28 @@ def populate_historical_data():
         # Generate trades for the past 3 months
         start_date = datetime(2024, 1, 1)
         end_date = datetime(2024, 3, 20)
-        current_date = start_date
+        n_hours = int((end_date - start_date).total_seconds() // 3600) + 1
         
-        # Simulate Gold price starting at $2000
-        current_price = 2000.0
+        # Simulate Gold price starting at $2000 (random walk with drift)
+        price_changes = np.random.normal(0.5, 5.0, size=n_hours)  # Mean: $0.5, Std: $5.0
+        prices = np.round(2000.0 + price_changes.cumsum(), 2)
+        times = pd.date_range(start_date, periods=n_hours, freq='h')
         
-        while current_date <= end_date:
-            # Simulate price movement (random walk with drift)
-            price_change = random.normalvariate(0.5, 5.0)  # Mean: $0.5, Std: $5.0
-            current_price += price_change
-            
-            # Create both BUY and SELL trades
-            trade_types = ['BUY', 'SELL']
-            for trade_type in trade_types:
-                trade = Trade(
-                    symbol='XAU_USD',
-                    trade_type=trade_type,
-                    amount=1,  # 1 oz of gold
-                    price=round(current_price, 2),
-                    created_at=current_date
-                )
-                db.add(trade)
-            
-            # Move to next hour
-            current_date += timedelta(hours=1)
+        # Create both BUY and SELL trades for every hour
+        rows = [
+            {
+                'symbol': 'XAU_USD',
+                'trade_type': trade_type,
+                'amount': 1,  # 1 oz of gold
+                'price': price,
+                'created_at': created_at
+            }
+            for created_at, price in zip(times.to_pydatetime(), prices.tolist())
+            for trade_type in ('BUY', 'SELL')
+        ]
         
+        # Insert all rows in a single executemany instead of one ORM add per trade
+        db.bulk_insert_mappings(Trade, rows)
         db.commit()
         print("Database populated successfully!")
         
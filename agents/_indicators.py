@@ -0,0 +1,82 @@
+"""
+NumPy and Numba kernels for the technical indicators used by the strategy agents.
+
+Each kernel walks the price array once and returns a float64 array of the same
+length, with NaN where the indicator window is not yet full. Inputs are assumed
+to be free of NaNs.
+"""
+
+import numpy as np
+from numba import njit
+
+
+def fast_sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average from one running sum: O(N) regardless of window"""
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window < 1 or n < window:
+        return out
+    csum = np.cumsum(values, dtype=np.float64)
+    out[window - 1:] = csum[window - 1:]
+    out[window:] -= csum[:-window]
+    return out / window
+
+
+@njit(cache=True)
+def wilder_rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index using Wilder's smoothing (RMA) of gains and losses"""
+    n = len(close)
+    rsi = np.full(n, np.nan)
+    if n <= period:
+        return rsi
+
+    # Seed the averages with the simple mean of the first `period` changes
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        change = close[i] - close[i - 1]
+        if change > 0:
+            avg_gain += change
+        else:
+            avg_loss -= change
+    avg_gain /= period
+    avg_loss /= period
+
+    for i in range(period, n):
+        if i > period:
+            change = close[i] - close[i - 1]
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss > 0:
+            rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            rsi[i] = 100.0
+    return rsi
+
+
+@njit(cache=True)
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sample standard deviation using Welford's update over a sliding window"""
+    n = len(values)
+    out = np.full(n, np.nan)
+    if window < 2 or n < window:
+        return out
+
+    mean = 0.0
+    m2 = 0.0
+    for i in range(window):
+        delta = values[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (values[i] - mean)
+    out[window - 1] = np.sqrt(max(m2, 0.0) / (window - 1))
+
+    for i in range(window, n):
+        new = values[i]
+        old = values[i - window]
+        old_mean = mean
+        mean += (new - old) / window
+        m2 += (new - old) * (new - mean + old - old_mean)
+        out[i] = np.sqrt(max(m2, 0.0) / (window - 1))
+    return out
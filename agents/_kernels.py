@@ -0,0 +1,96 @@
+"""
+Numba kernels for the short-lived agent CLIs, optionally compiled ahead of time.
+
+Running ``python _kernels.py`` builds the ``ta_kernels`` extension module next
+to this file. When that module is importable, the agents use its precompiled
+functions and pay no JIT compilation at startup. Otherwise the same functions
+are JIT compiled on first use, and that result is cached.
+"""
+
+import os
+import numpy as np
+from numba import njit
+
+
+def _rsi(prices, window):
+    """Wilder-smoothed RSI over a float64 price array, compiled to native code"""
+    n = len(prices)
+    deltas = np.diff(prices)
+    
+    seed = deltas[:window+1]
+    up = 0.0
+    down = 0.0
+    has_up = False
+    has_down = False
+    for d in seed:
+        if d >= 0:
+            up += d
+            has_up = True
+        else:
+            down -= d
+            has_down = True
+    up = up/window if has_up else 0.0
+    down = down/window if has_down else 0.0001  # Avoid division by zero
+    
+    rsi = np.zeros(n)
+    rsi[:window] = 100. - 100./(1. + up/down)
+    
+    for i in range(window, n):
+        delta = deltas[i-1]
+        up = (up * (window - 1) + max(delta, 0.)) / window
+        down = (down * (window - 1) + max(-delta, 0.)) / window
+        
+        # Avoid division by zero
+        if down == 0:
+            down = 0.0001
+        
+        rsi[i] = 100. - 100./(1. + up/down)
+    
+    return rsi
+
+
+def _portfolio_stats(total):
+    """Returns, cumulative returns, running peak and drawdown of the portfolio value in one pass"""
+    n = len(total)
+    returns = np.full(n, np.nan)
+    cumulative = np.full(n, np.nan)
+    peak = np.empty(n)
+    drawdown = np.empty(n)
+    
+    growth = 1.0
+    high = np.nan
+    for i in range(n):
+        value = total[i]
+        if i > 0:
+            r = value / total[i-1] - 1
+            returns[i] = r
+            # NaN returns are skipped, as cumprod() does
+            if not np.isnan(r):
+                growth *= 1.0 + r
+                cumulative[i] = growth
+        if value > high or np.isnan(high):  # A NaN value never raises the peak
+            high = value
+        peak[i] = high
+        drawdown[i] = (value - high) / high
+    
+    return returns, cumulative, peak, drawdown
+
+
+try:
+    from ta_kernels import rsi, portfolio_stats
+    AOT_AVAILABLE = True
+except ImportError:
+    rsi = njit(cache=True)(_rsi)
+    portfolio_stats = njit(cache=True)(_portfolio_stats)
+    AOT_AVAILABLE = False
+
+
+if __name__ == "__main__":
+    from numba.pycc import CC
+
+    cc = CC('ta_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export('rsi', 'f8[::1](f8[::1], i8)')(_rsi)
+    cc.export('portfolio_stats', 'UniTuple(f8[::1], 4)(f8[::1])')(_portfolio_stats)
+    cc.compile()
+    print(f"Built ta_kernels in {cc.output_dir}")
@@ -4,13 +4,36 @@ os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from numba import njit
+from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 from ml_strategy_agent import MLStrategyAgent
+import candle_cache
+import logging
 import traceback
 
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+HISTORICAL_URL = "http://localhost:8000/historical/{symbol}"
+FETCH_WORKERS = 8  # Number of date sub-ranges fetched in parallel
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+log = logging.getLogger(__name__)
+
+# Shared keep-alive session for the FastAPI data service
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=FETCH_WORKERS))
+
 class TradingBacktest:
     def __init__(self, start_date: str, end_date: str, timeframe: str = "H1"):
         self.start_date = start_date
@@ -24,40 +47,99 @@ class TradingBacktest:
         }
         self.ml_agent = MLStrategyAgent()
         self.initial_capital = 100000  # $100k starting capital
+        self._ind_cache: Dict[Tuple, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+
+    def _indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Indicators for df, computed once per candle frame"""
+        key = (id(df), df.index[0], df.index[-1], len(df))
+        cached = self._ind_cache.get(key)
+        # Keep the source frame alongside so its id can't be reused by another frame
+        if cached is None or cached[0] is not df:
+            cached = (df, self.ml_agent.calculate_indicators(df))
+            self._ind_cache[key] = cached
+        return cached[1]
+
+    def _date_chunks(self, start_date: str, end_date: str,
+                     n_chunks: int = FETCH_WORKERS) -> List[Tuple[str, str]]:
+        """Split [start_date, end_date] into contiguous, non-overlapping day ranges"""
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+        total_days = (end - start).days + 1
+        n_chunks = max(1, min(n_chunks, total_days))
+        
+        bounds = np.linspace(0, total_days, n_chunks + 1).astype(int)
+        return [
+            ((start + timedelta(days=int(lo))).strftime("%Y-%m-%d"),
+             (start + timedelta(days=int(hi) - 1)).strftime("%Y-%m-%d"))
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def _fetch_chunk(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch one date sub-range of candles from the FastAPI service"""
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'timeframe': self.timeframe
+        }
+        # Ask for Arrow when we can read it; the service falls back to JSON otherwise
+        headers = {'Accept': f"{ARROW_STREAM}, application/json"} if ARROW_AVAILABLE else {}
+        response = _session.get(HISTORICAL_URL.format(symbol=symbol), params=params, headers=headers)
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"Error response: {response.text}")
+        
+        if response.headers.get('Content-Type', '').startswith(ARROW_STREAM):
+            table = pa.ipc.open_stream(response.content).read_all()
+            if table.num_rows == 0:
+                return pd.DataFrame()
+            return table.to_pandas(split_blocks=True, self_destruct=True).set_index('timestamp')
+        
+        # The service returns one list per column
+        data = orjson.loads(response.content)
+        if not data.get('timestamp'):
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(data)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df.set_index('timestamp')
+
+    def _fetch_range(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch [start_date, end_date] from the FastAPI service in parallel sub-ranges"""
+        # The requests are I/O-bound, so fan the sub-ranges out over threads
+        chunks = self._date_chunks(start_date, end_date)
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            dfs = list(executor.map(lambda chunk: self._fetch_chunk(symbol, *chunk), chunks))
+        
+        dfs = [chunk_df for chunk_df in dfs if not chunk_df.empty]
+        if not dfs:
+            return pd.DataFrame()
+        
+        # Merge the sub-ranges back into one time-ordered frame
+        df = pd.concat(dfs).sort_index()
+        return df[~df.index.duplicated(keep='first')]
 
     def fetch_historical_data(self, symbol: str) -> pd.DataFrame:
         """Fetch historical data from OANDA via FastAPI"""
         try:
-            url = f"http://localhost:8000/historical/{symbol}"
-            params = {
-                'start_date': self.start_date,
-                'end_date': self.end_date,
-                'timeframe': self.timeframe
-            }
-            
             print(f"Fetching {symbol} data from {self.start_date} to {self.end_date}")
             print(f"Timeframe: {self.timeframe}")
             
-            response = requests.get(url, params=params)
-            
-            if response.status_code != 200:
-                print(f"Error response: {response.text}")
-                return pd.DataFrame()
-            
-            data = response.json()
+            # Cached days are read locally; only missing days hit the API
+            df = candle_cache.get_or_fetch(
+                symbol, self.timeframe, self.start_date, self.end_date,
+                lambda start, end: self._fetch_range(symbol, start, end)
+            )
             
-            if not data:
+            if df.empty:
                 print("No historical data found for the specified period")
                 return pd.DataFrame()
             
-            # Convert to DataFrame and set timestamp as index
-            df = pd.DataFrame(data)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)  # Set timestamp as index
+            # float32 halves the memory traffic of the indicator/backtest passes
+            df[PRICE_COLUMNS] = df[PRICE_COLUMNS].astype(np.float32)
+            df['volume'] = df['volume'].astype(np.uint32)
             
             print(f"\nReceived {len(df)} candles")
-            print("\nSample data:")
-            print(df.head())
+            log.debug("Sample data:\n%s", df.head())
             
             return df
             
@@ -111,15 +193,14 @@ class TradingBacktest:
     
     def calculate_drawdowns(self, equity_curve: pd.Series) -> pd.DataFrame:
         """Calculate drawdown metrics"""
-        rolling_max = equity_curve.expanding().max()
+        equity = equity_curve.to_numpy(dtype=np.float64)
+        peaks, drawdown, duration = _drawdown_kernel(equity)
         drawdowns = pd.DataFrame({
             'equity': equity_curve,
-            'previous_peaks': rolling_max,
-            'drawdown': (equity_curve - rolling_max) / rolling_max * 100,
-        })
-        drawdowns['drawdown_duration'] = (drawdowns['drawdown'] < 0).astype(int).groupby(
-            (drawdowns['drawdown'] == 0).cumsum()
-        ).cumsum()
+            'previous_peaks': peaks,
+            'drawdown': drawdown,
+            'drawdown_duration': duration
+        }, index=equity_curve.index)
         
         return drawdowns
     
@@ -162,7 +243,7 @@ class TradingBacktest:
         """Find the best performing indicators"""
         try:
             # Calculate all indicators
-            data = self.ml_agent.calculate_indicators(data)
+            data = self._indicators(data)
             
             # Prepare features for analysis
             X, y, feature_names = self.ml_agent.prepare_features(data)
@@ -171,14 +252,12 @@ class TradingBacktest:
             best_features = self.ml_agent.find_best_features(X, y, feature_names)
             
             # Calculate success rate for each indicator
-            indicator_performance = {}
-            for feature in best_features:
-                if feature in data.columns:
-                    # Simple correlation with future returns
-                    correlation = data[feature].corr(data['returns'].shift(-1))
-                    indicator_performance[feature] = abs(correlation)
-            
-            return indicator_performance
+            # Simple correlation with future returns, for all indicators in one pass
+            features = [f for f in dict.fromkeys(best_features) if f in data.columns]
+            future_returns = data['returns'].shift(-1)
+            indicator_performance = data[features].corrwith(future_returns).abs()
+
+            return indicator_performance.to_dict()
             
         except Exception as e:
             print(f"Error in find_best_indicators: {e}")
@@ -189,7 +268,7 @@ class TradingBacktest:
         """Use ML to optimize trading strategy"""
         try:
             print("\nAnalyzing market conditions...")
-            analysis = self.ml_agent.analyze_market(data)
+            analysis = self.ml_agent.analyze_market(data, indicators=self._indicators(data))
             
             print(f"\nFound {len(analysis['signals'])} trading signals")
             
@@ -204,7 +283,7 @@ class TradingBacktest:
         """Analyze OHLC candle patterns and calculate basic indicators"""
         try:
             # Calculate basic indicators using ML agent
-            df = self.ml_agent.calculate_indicators(df)
+            df = self._indicators(df)
             
             # Prepare features and train model
             X, y, feature_names = self.ml_agent.prepare_features(df)
@@ -213,23 +292,17 @@ class TradingBacktest:
             best_features = self.ml_agent.find_best_features(X, y, feature_names)
             
             # Generate trading signals
-            signals = []
-            for i in range(1, len(df)):
-                # Example signal generation (you can modify this based on ML predictions)
-                if df['RSI_14'].iloc[i] < 30 and df['close'].iloc[i] > df['SMA_50'].iloc[i]:
-                    signals.append({
-                        'timestamp': df.index[i],
-                        'type': 'BUY',
-                        'price': df['close'].iloc[i],
-                        'reason': 'RSI oversold + Above SMA50'
-                    })
-                elif df['RSI_14'].iloc[i] > 70 and df['close'].iloc[i] < df['SMA_50'].iloc[i]:
-                    signals.append({
-                        'timestamp': df.index[i],
-                        'type': 'SELL',
-                        'price': df['close'].iloc[i],
-                        'reason': 'RSI overbought + Below SMA50'
-                    })
+            # Example signal generation (you can modify this based on ML predictions)
+            buy_mask = (df['RSI_14'] < 30) & (df['close'] > df['SMA_50'])
+            sell_mask = (df['RSI_14'] > 70) & (df['close'] < df['SMA_50'])
+            # The first candle never produces a signal
+            buy_mask.iloc[0] = sell_mask.iloc[0] = False
+
+            buys = df.loc[buy_mask, ['close']].assign(type='BUY', reason='RSI oversold + Above SMA50')
+            sells = df.loc[sell_mask, ['close']].assign(type='SELL', reason='RSI overbought + Below SMA50')
+            signals_df = pd.concat([buys, sells]).sort_index()
+            signals_df = signals_df.rename(columns={'close': 'price'}).rename_axis('timestamp').reset_index()
+            signals = signals_df[['timestamp', 'type', 'price', 'reason']].to_dict('records')
             
             return {
                 'start_price': df['open'].iloc[0],
@@ -247,118 +320,115 @@ class TradingBacktest:
 
     def generate_trades(self, data: pd.DataFrame, analysis: Dict) -> pd.DataFrame:
         """Generate trades based on signals"""
-        trades = []
-        position = None
-        entry_price = 0
+        signals = analysis['signals']
+        if not signals:
+            return pd.DataFrame()
         
-        for i in range(len(data)):
-            current_price = data['close'].iloc[i]
-            timestamp = data.index[i]
-            
-            # Check for signals
-            signals = [s for s in analysis['signals'] if s['timestamp'] == timestamp]
-            
-            for signal in signals:
-                if signal['type'] == 'BUY' and position != 'LONG':
-                    # Close any existing short position
-                    if position == 'SHORT':
-                        pnl = entry_price - current_price
-                        trades.append({
-                            'timestamp': timestamp,
-                            'type': 'SELL_CLOSE',
-                            'price': current_price,
-                            'pnl': pnl
-                        })
-                    # Open long position
-                    position = 'LONG'
-                    entry_price = current_price
-                    trades.append({
-                        'timestamp': timestamp,
-                        'type': 'BUY',
-                        'price': current_price,
-                        'pnl': 0
-                    })
-                    
-                elif signal['type'] == 'SELL' and position != 'SHORT':
-                    # Close any existing long position
-                    if position == 'LONG':
-                        pnl = current_price - entry_price
-                        trades.append({
-                            'timestamp': timestamp,
-                            'type': 'BUY_CLOSE',
-                            'price': current_price,
-                            'pnl': pnl
-                        })
-                    # Open short position
-                    position = 'SHORT'
-                    entry_price = current_price
-                    trades.append({
-                        'timestamp': timestamp,
-                        'type': 'SELL',
-                        'price': current_price,
-                        'pnl': 0
-                    })
+        # Map each signal onto its candle and replay them in candle order
+        direction = _signal_directions(signals)
+        candle_idx = data.index.get_indexer(pd.Index([s['timestamp'] for s in signals]))
+        valid = (candle_idx >= 0) & (direction != 0)
+        order = np.argsort(candle_idx[valid], kind='stable')
+        candle_idx = candle_idx[valid][order]
+        direction = direction[valid][order]
+        if len(direction) == 0:
+            return pd.DataFrame()
+        
+        # Only signals that flip the position produce trades
+        flips = _position_flips(direction)
+        candle_idx = candle_idx[flips]
+        direction = direction[flips]
+        price = data['close'].to_numpy()[candle_idx]
+        timestamp = data.index[candle_idx]
+        
+        # Every flip after the first closes the previous position before opening the new one
+        n = len(direction)
+        rows = np.concatenate([[0], np.repeat(np.arange(1, n), 2)])
+        is_close = np.zeros(len(rows), dtype=bool)
+        is_close[1::2] = True
+        
+        pnl = np.zeros(len(rows))
+        pnl[is_close] = -direction[1:] * (price[1:] - price[:-1])
         
-        return pd.DataFrame(trades)
+        open_type = np.where(direction[rows] > 0, 'BUY', 'SELL')
+        close_type = np.where(direction[rows] > 0, 'SELL_CLOSE', 'BUY_CLOSE')
+        
+        return pd.DataFrame({
+            'timestamp': timestamp[rows],
+            'type': np.where(is_close, close_type, open_type),
+            'price': price[rows],
+            'pnl': pnl
+        })
 
     def evaluate_signals(self, data: pd.DataFrame, signals: List[Dict]) -> Dict:
         """Evaluate trading signals performance"""
-        trades = []
-        position = None
-        entry_price = 0
+        direction = _signal_directions(signals)
+        valid = direction != 0
+        direction = direction[valid]
+        if len(direction) == 0:
+            return pd.DataFrame()
         
-        for signal in signals:
-            timestamp = signal['timestamp']
-            price = signal['price']
-            
-            if signal['type'] == 'BUY':
-                if position is None:  # Open long
-                    position = 'LONG'
-                    entry_price = price
-                elif position == 'SHORT':  # Close short and open long
-                    pnl = entry_price - price
-                    trades.append({
-                        'entry_time': timestamp,
-                        'exit_time': timestamp,
-                        'type': 'SHORT',
-                        'entry_price': entry_price,
-                        'exit_price': price,
-                        'pnl': pnl
-                    })
-                    position = 'LONG'
-                    entry_price = price
-                    
-            elif signal['type'] == 'SELL':
-                if position is None:  # Open short
-                    position = 'SHORT'
-                    entry_price = price
-                elif position == 'LONG':  # Close long and open short
-                    pnl = price - entry_price
-                    trades.append({
-                        'entry_time': timestamp,
-                        'exit_time': timestamp,
-                        'type': 'LONG',
-                        'entry_price': entry_price,
-                        'exit_price': price,
-                        'pnl': pnl
-                    })
-                    position = 'SHORT'
-                    entry_price = price
+        price = np.array([s['price'] for s in signals], dtype=float)[valid]
+        timestamp = pd.Index([s['timestamp'] for s in signals])[valid]
+        
+        # Only signals that flip the position close a trade
+        flips = _position_flips(direction)
+        direction = direction[flips]
+        price = price[flips]
+        timestamp = timestamp[flips]
+        
+        trades = pd.DataFrame({
+            'entry_time': timestamp[1:],
+            'exit_time': timestamp[1:],
+            'type': np.where(direction[1:] > 0, 'SHORT', 'LONG'),
+            'entry_price': price[:-1],
+            'exit_price': price[1:],
+            'pnl': -direction[1:] * (price[1:] - price[:-1])
+        })
         
         # Close any open position at the end
-        if position:
-            last_price = data['close'].iloc[-1]
-            pnl = last_price - entry_price if position == 'LONG' else entry_price - last_price
-            trades.append({
-                'entry_time': timestamp,
-                'exit_time': data.index[-1],
-                'type': position,
-                'entry_price': entry_price,
-                'exit_price': last_price,
-                'pnl': pnl
-            })
+        last_price = data['close'].iloc[-1]
+        final = pd.DataFrame({
+            'entry_time': [signals[-1]['timestamp']],
+            'exit_time': [data.index[-1]],
+            'type': ['LONG' if direction[-1] > 0 else 'SHORT'],
+            'entry_price': [price[-1]],
+            'exit_price': [last_price],
+            'pnl': [direction[-1] * (last_price - price[-1])]
+        })
         
-        return pd.DataFrame(trades)
+        return pd.concat([trades, final], ignore_index=True)
+
+@njit(cache=True)
+def _drawdown_kernel(equity):
+    """Running peak, drawdown % and bars since the last peak in a single pass"""
+    n = len(equity)
+    peaks = np.empty(n)
+    drawdown = np.empty(n)
+    duration = np.empty(n, dtype=np.int64)
+    peak = equity[0] if n else 0.0
+    bars = 0
+    for i in range(n):
+        if equity[i] >= peak:
+            peak = equity[i]
+            bars = 0
+        else:
+            bars += 1
+        peaks[i] = peak
+        drawdown[i] = (equity[i] - peak) / peak * 100
+        duration[i] = bars
+    return peaks, drawdown, duration
+
+def _signal_directions(signals: List[Dict]) -> np.ndarray:
+    """Encode signal types as +1 (BUY), -1 (SELL) or 0 (anything else)"""
+    types = np.array([s['type'] for s in signals], dtype=object)
+    return np.select([types == 'BUY', types == 'SELL'], [1, -1], 0).astype(np.int8)
+
+def _position_flips(direction: np.ndarray) -> np.ndarray:
+    """Mask of signals that change the position; repeats of the current side are no-ops"""
+    flips = np.ones(len(direction), dtype=bool)
+    flips[1:] = direction[1:] != direction[:-1]
+    return flips
 
 if __name__ == "__main__":
     # Create an instance of TradingBacktest
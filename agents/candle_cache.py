@@ -0,0 +1,145 @@
+"""
+Candle Cache
+
+Local SQLite cache for historical candles fetched through the FastAPI/OANDA
+service. Candles are keyed by (symbol, timeframe, timestamp) and every day that
+has been fetched is recorded, so repeated backtests only request the days that
+are missing from the cache.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Tuple
+import pandas as pd
+
+CACHE_PATH = os.getenv(
+    "CANDLE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "candle_cache.db")
+)
+
+DATE_FORMAT = "%Y-%m-%d"
+TS_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _connect(path: str = CACHE_PATH) -> sqlite3.Connection:
+    """Open the cache database and make sure the schema exists"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS candles (
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume INTEGER,
+            PRIMARY KEY (symbol, timeframe, ts)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fetched_days (
+            symbol TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            day TEXT NOT NULL,
+            PRIMARY KEY (symbol, timeframe, day)
+        )
+    """)
+    return conn
+
+
+def _missing_ranges(conn: sqlite3.Connection, symbol: str, timeframe: str,
+                    start: datetime, end: datetime) -> List[Tuple[str, str]]:
+    """Return contiguous (start_day, end_day) ranges that have not been fetched yet"""
+    fetched = {
+        row[0] for row in conn.execute(
+            "SELECT day FROM fetched_days WHERE symbol=? AND timeframe=? AND day BETWEEN ? AND ?",
+            (symbol, timeframe, start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT))
+        )
+    }
+
+    gaps = []
+    gap_start = None
+    day = start
+    while day <= end:
+        if day.strftime(DATE_FORMAT) in fetched:
+            if gap_start is not None:
+                gaps.append((gap_start, day - timedelta(days=1)))
+                gap_start = None
+        elif gap_start is None:
+            gap_start = day
+        day += timedelta(days=1)
+    if gap_start is not None:
+        gaps.append((gap_start, end))
+
+    return [(lo.strftime(DATE_FORMAT), hi.strftime(DATE_FORMAT)) for lo, hi in gaps]
+
+
+def _store(conn: sqlite3.Connection, symbol: str, timeframe: str, df: pd.DataFrame,
+           start_day: str, end_day: str):
+    """Insert fetched candles and mark their days as fetched"""
+    if not df.empty:
+        timestamps = pd.to_datetime(df.index, utc=True).strftime(TS_FORMAT)
+        rows = zip(
+            [symbol] * len(df), [timeframe] * len(df), timestamps,
+            df['open'].tolist(), df['high'].tolist(), df['low'].tolist(),
+            df['close'].tolist(), df['volume'].astype(int).tolist()
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+
+    # Only complete days are final; today's candles may still be forming
+    today = datetime.now(timezone.utc).strftime(DATE_FORMAT)
+    day = datetime.strptime(start_day, DATE_FORMAT)
+    last = datetime.strptime(end_day, DATE_FORMAT)
+    days = []
+    while day <= last and day.strftime(DATE_FORMAT) < today:
+        days.append((symbol, timeframe, day.strftime(DATE_FORMAT)))
+        day += timedelta(days=1)
+    conn.executemany("INSERT OR IGNORE INTO fetched_days VALUES (?, ?, ?)", days)
+
+
+def get_or_fetch(symbol: str, timeframe: str, start_date: str, end_date: str,
+                 fetcher: Callable[[str, str], pd.DataFrame],
+                 path: str = CACHE_PATH) -> pd.DataFrame:
+    """
+    Return candles for [start_date, end_date], fetching only uncached days
+
+    Args:
+        symbol: Instrument symbol (e.g. XAU_USD)
+        timeframe: OANDA granularity (e.g. H1)
+        start_date: First day to return (YYYY-MM-DD)
+        end_date: Last day to return (YYYY-MM-DD)
+        fetcher: Callable taking (start_day, end_day) and returning a DataFrame
+            indexed by timestamp with open/high/low/close/volume columns
+        path: Path to the SQLite cache file
+
+    Returns:
+        DataFrame indexed by UTC timestamp
+    """
+    start = datetime.strptime(start_date, DATE_FORMAT)
+    end = datetime.strptime(end_date, DATE_FORMAT)
+
+    conn = _connect(path)
+    try:
+        for gap_start, gap_end in _missing_ranges(conn, symbol, timeframe, start, end):
+            df = fetcher(gap_start, gap_end)
+            with conn:
+                _store(conn, symbol, timeframe, df, gap_start, gap_end)
+
+        df = pd.read_sql(
+            "SELECT ts AS timestamp, open, high, low, close, volume FROM candles "
+            "WHERE symbol=? AND timeframe=? AND ts >= ? AND ts < ? ORDER BY ts",
+            conn,
+            params=(symbol, timeframe, start_date,
+                    (end + timedelta(days=1)).strftime(DATE_FORMAT))
+        )
+    finally:
+        conn.close()
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    return df.set_index('timestamp')
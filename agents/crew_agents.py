@@ -1,5 +1,7 @@
 from crewai import Agent, Task, Crew
 from langchain_openai import ChatOpenAI
+from langchain.globals import set_llm_cache
+from langchain_community.cache import InMemoryCache
 from dotenv import load_dotenv
 import os
 
@@ -9,8 +11,17 @@ parent_dir = os.path.dirname(current_dir)
 env_path = os.path.join(parent_dir, '.env')
 load_dotenv(env_path)
 
-# Initialize the LLM
-llm = ChatOpenAI(model="gpt-4-turbo-preview")
+# Identical prompts within one run (e.g. retries) are answered from memory
+# instead of a new API call; the cache is not persisted, since the prompts ask
+# about current conditions and a stored answer would go stale
+set_llm_cache(InMemoryCache())
+
+# Initialize the LLM (one shared, streaming client for all agents)
+llm = ChatOpenAI(model="gpt-4-turbo-preview", streaming=True)
+
+# Shared opening for every task so the prompts start with the same prefix
+XAUUSD_CONTEXT = """Market context: all analysis concerns XAUUSD (spot gold quoted in US dollars).
+"""
 
 # Create Specialized Agents
 technical_analyst = Agent(
@@ -51,17 +62,18 @@ risk_manager = Agent(
 
 # Create Tasks
 technical_analysis_task = Task(
-    description="""Analyze current technical indicators and chart patterns for XAUUSD (Gold). Provide:
+    description=XAUUSD_CONTEXT + """Analyze current technical indicators and chart patterns for XAUUSD (Gold). Provide:
     - Key support/resistance levels
     - Relevant technical indicators (RSI, MACD, Moving Averages)
     - Chart pattern analysis
     Focus specifically on XAUUSD (Gold) price action.""",
     expected_output="A technical analysis summary for XAUUSD with specific levels and patterns identified.",
-    agent=technical_analyst
+    agent=technical_analyst,
+    async_execution=True  # Independent of the fundamental analysis; run concurrently
 )
 
 fundamental_analysis_task = Task(
-    description="""Review current economic conditions and news affecting Gold (XAUUSD). Identify:
+    description=XAUUSD_CONTEXT + """Review current economic conditions and news affecting Gold (XAUUSD). Identify:
     - Key economic events affecting gold prices
     - US Dollar strength/weakness
     - Market risk sentiment
@@ -69,11 +81,12 @@ fundamental_analysis_task = Task(
     - Geopolitical factors affecting gold
     Focus on factors that directly impact gold prices.""",
     expected_output="A fundamental analysis summary with key gold market drivers identified.",
-    agent=fundamental_analyst
+    agent=fundamental_analyst,
+    async_execution=True
 )
 
 risk_assessment_task = Task(
-    description="""Based on the technical and fundamental analysis, provide a trade recommendation for XAUUSD:
+    description=XAUUSD_CONTEXT + """Based on the technical and fundamental analysis, provide a trade recommendation for XAUUSD:
     PAIR: XAUUSD.PRO
     POSITION: [LONG/SHORT]
     ENTRY: [specific price range in USD]
@@ -82,7 +95,8 @@ risk_assessment_task = Task(
     POSITION SIZE: [recommended size]
     REASON: [1-2 sentences only]""",
     expected_output="A complete trade recommendation for XAUUSD with risk management parameters.",
-    agent=risk_manager
+    agent=risk_manager,
+    context=[technical_analysis_task, fundamental_analysis_task]  # Waits for both analyses
 )
 
 # Create Crew
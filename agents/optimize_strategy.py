@@ -15,8 +15,46 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
 from itertools import product
+import multiprocessing
 from simple_strategy_agent import SimpleStrategyAgent
 
+# Historical data shared with each worker process by _init_worker
+_worker_data = None
+
+def _init_worker(data, log_file):
+    """Receive the shared data once per worker and send its output to log_file"""
+    global _worker_data
+    _worker_data = data
+    sys.stdout = open(log_file, 'a', buffering=1)
+
+def _run_one(params):
+    """
+    Backtest a single parameter combination in a worker process
+    
+    Args:
+        params: Tuple of (fast, slow, symbol, days, capital, log_dir, metric)
+    
+    Returns:
+        Tuple of (fast, slow, backtest_results, error message or None)
+    """
+    fast, slow, symbol, days, capital, log_dir, metric = params
+    print(f"Testing combination: Fast MA={fast}, Slow MA={slow}")
+    try:
+        agent = SimpleStrategyAgent(
+            symbol=symbol,
+            fast_period=fast,
+            slow_period=slow,
+            data_source="historical",
+            backtest_days=days,
+            log_dir=log_dir,
+            verbose=False
+        )
+        agent.arrays = _worker_data  # Read-only here; generate_signals keeps its results on the agent
+        agent.generate_signals()
+        return fast, slow, agent.backtest_strategy(initial_capital=capital), None
+    except Exception as e:
+        return fast, slow, None, str(e)
+
 def optimize_strategy(symbol="BTC/USD", days=180, capital=10000.0, 
                      fast_range=(5, 50, 5), slow_range=(10, 100, 10),
                      metric="sharpe_ratio", log_dir="logs"):
@@ -44,6 +82,19 @@ def optimize_strategy(symbol="BTC/USD", days=180, capital=10000.0,
     fast_periods = range(fast_range[0], fast_range[1] + 1, fast_range[2])
     slow_periods = range(slow_range[0], slow_range[1] + 1, slow_range[2])
     
+    # Skip invalid combinations (fast must be less than slow)
+    combos = [(fast, slow, symbol, days, capital, log_dir, metric)
+              for fast, slow in product(fast_periods, slow_periods) if fast < slow]
+    
+    # Load the data once; every trial backtests the same series
+    loader = SimpleStrategyAgent(
+        symbol=symbol,
+        data_source="historical",
+        backtest_days=days,
+        log_dir=log_dir
+    )
+    loader.load_data()
+    
     # Store results
     results = []
     
@@ -52,73 +103,55 @@ def optimize_strategy(symbol="BTC/USD", days=180, capital=10000.0,
     best_fast = None
     best_slow = None
     
-    # Test all combinations
-    total_combinations = len(fast_periods) * len(slow_periods)
-    current = 0
-    
     start_time = time.time()
     
-    for fast, slow in product(fast_periods, slow_periods):
-        # Skip invalid combinations (fast must be less than slow)
-        if fast >= slow:
+    # Trials are independent, so run them across all cores; worker output goes to a log file
+    worker_log = os.path.join(log_dir, f"{symbol.replace('/', '_')}_optimization_workers.log")
+    total_combinations = len(combos)
+    processes = os.cpu_count()
+    print(f"Testing {total_combinations} combinations on {processes} processes (worker log: {worker_log})")
+    
+    # Collect in completion order for progress, then replay in grid order so ties
+    # resolve the same way on every run
+    trial_results = {}
+    chunksize = max(1, total_combinations // (processes * 4))
+    with multiprocessing.Pool(processes=processes, initializer=_init_worker,
+                              initargs=(loader.arrays, worker_log)) as pool:
+        for current, (fast, slow, backtest_results, error) in enumerate(
+                pool.imap_unordered(_run_one, combos, chunksize=chunksize), 1):
+            trial_results[(fast, slow)] = (backtest_results, error)
+            print(f"Completed combination {current}/{total_combinations}: Fast MA={fast}, Slow MA={slow}")
+    
+    for fast, slow, *_ in combos:
+        backtest_results, error = trial_results[(fast, slow)]
+        if error is not None:
+            print(f"Error testing Fast MA={fast}, Slow MA={slow}: {error}")
             continue
         
-        current += 1
-        print(f"Testing combination {current}/{total_combinations}: Fast MA={fast}, Slow MA={slow}")
+        # Get result for the metric we're optimizing
+        result = backtest_results[metric]
         
-        # Create agent with current parameters
-        agent = SimpleStrategyAgent(
-            symbol=symbol,
-            fast_period=fast,
-            slow_period=slow,
-            data_source="historical",
-            backtest_days=days,
-            log_dir=log_dir
-        )
+        # For max_drawdown, we want to minimize the absolute value
+        if metric == "max_drawdown":
+            result = -result  # Convert to positive for maximization
         
-        # Run backtest silently (redirect stdout)
-        original_stdout = sys.stdout
-        sys.stdout = open(os.devnull, 'w')
+        # Store result
+        results.append({
+            'fast_period': fast,
+            'slow_period': slow,
+            'total_return': backtest_results['total_return'],
+            'annual_return': backtest_results['annual_return'],
+            'sharpe_ratio': backtest_results['sharpe_ratio'],
+            'max_drawdown': backtest_results['max_drawdown'],
+            'win_rate': backtest_results['win_rate']
+        })
         
-        try:
-            agent.load_data()
-            agent.generate_signals()
-            backtest_results = agent.backtest_strategy(initial_capital=capital)
-            
-            # Restore stdout
-            sys.stdout.close()
-            sys.stdout = original_stdout
-            
-            # Get result for the metric we're optimizing
-            result = backtest_results[metric]
-            
-            # For max_drawdown, we want to minimize the absolute value
-            if metric == "max_drawdown":
-                result = -result  # Convert to positive for maximization
-            
-            # Store result
-            results.append({
-                'fast_period': fast,
-                'slow_period': slow,
-                'total_return': backtest_results['total_return'],
-                'annual_return': backtest_results['annual_return'],
-                'sharpe_ratio': backtest_results['sharpe_ratio'],
-                'max_drawdown': backtest_results['max_drawdown'],
-                'win_rate': backtest_results['win_rate']
-            })
-            
-            # Check if this is the best result
-            if result > best_result:
-                best_result = result
-                best_fast = fast
-                best_slow = slow
-                print(f"New best result: Fast MA={fast}, Slow MA={slow}, {metric}={backtest_results[metric]:.4f}")
-        
-        except Exception as e:
-            # Restore stdout in case of error
-            sys.stdout.close()
-            sys.stdout = original_stdout
-            print(f"Error testing Fast MA={fast}, Slow MA={slow}: {str(e)}")
+        # Check if this is the best result
+        if result > best_result:
+            best_result = result
+            best_fast = fast
+            best_slow = slow
+            print(f"New best result: Fast MA={fast}, Slow MA={slow}, {metric}={backtest_results[metric]:.4f}")
     
     elapsed_time = time.time() - start_time
     print(f"Optimization completed in {elapsed_time:.2f} seconds")
@@ -132,7 +165,7 @@ def optimize_strategy(symbol="BTC/USD", days=180, capital=10000.0,
     print(f"Results saved to {csv_file}")
     
     # Create heatmap of results
-    create_heatmap(results_df, metric, symbol, log_dir)
+    create_heatmap(results_df, metric, symbol, log_dir, fast_periods, slow_periods)
     
     # Run backtest with best parameters and generate plot
     print(f"Running backtest with best parameters: Fast MA={best_fast}, Slow MA={best_slow}")
@@ -145,23 +178,25 @@ def optimize_strategy(symbol="BTC/USD", days=180, capital=10000.0,
         log_dir=log_dir
     )
     
-    best_agent.load_data()
+    best_agent.arrays = loader.arrays  # Same series the trials were scored on
     best_agent.generate_signals()
     best_agent.backtest_strategy(initial_capital=capital)
     best_agent.plot_results()
     
     return best_fast, best_slow, best_result, results_df
 
-def create_heatmap(results_df, metric, symbol, log_dir):
+def create_heatmap(results_df, metric, symbol, log_dir, fast_periods, slow_periods):
     """Create a heatmap of optimization results"""
     print("Creating heatmap of results...")
     
-    # Pivot data for heatmap
-    pivot_data = results_df.pivot_table(
-        index='slow_period', 
-        columns='fast_period',
-        values=metric
-    )
+    # The (fast, slow) grid is known up front, so fill a dense array directly
+    fast_idx = {p: i for i, p in enumerate(fast_periods)}
+    slow_idx = {p: i for i, p in enumerate(slow_periods)}
+    grid = np.full((len(slow_periods), len(fast_periods)), np.nan)
+    if not results_df.empty:
+        rows = [slow_idx[p] for p in results_df['slow_period']]
+        cols = [fast_idx[p] for p in results_df['fast_period']]
+        grid[rows, cols] = results_df[metric].to_numpy()
     
     # Create figure
     plt.figure(figsize=(12, 10))
@@ -170,16 +205,16 @@ def create_heatmap(results_df, metric, symbol, log_dir):
     if metric == "max_drawdown":
         # For drawdown, use a different colormap and invert values (more negative is worse)
         heatmap = plt.pcolormesh(
-            pivot_data.columns, 
-            pivot_data.index, 
-            pivot_data.values, 
+            list(fast_periods), 
+            list(slow_periods), 
+            np.ma.masked_invalid(grid), 
             cmap='RdYlGn_r'
         )
     else:
         heatmap = plt.pcolormesh(
-            pivot_data.columns, 
-            pivot_data.index, 
-            pivot_data.values, 
+            list(fast_periods), 
+            list(slow_periods), 
+            np.ma.masked_invalid(grid), 
             cmap='RdYlGn'
         )
     
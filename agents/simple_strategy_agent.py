@@ -10,10 +10,20 @@ import os
 import sys
 import time
 import argparse
+import hashlib
+import zlib
+import multiprocessing
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from _indicators import fast_sma
+from market_arrays import MarketArrays
+from _kernels import portfolio_stats
+
+# Column order of the backtest portfolio table
+PORTFOLIO_COLUMNS = ['positions', 'cash', 'trade_costs', 'total',
+                     'returns', 'cumulative_returns', 'peak', 'drawdown']
 
 class SimpleStrategyAgent:
     """
@@ -21,7 +31,8 @@ class SimpleStrategyAgent:
     """
     
     def __init__(self, symbol="BTC/USD", fast_period=20, slow_period=50, 
-                 data_source="historical", backtest_days=365, log_dir="logs"):
+                 data_source="historical", backtest_days=365, log_dir="logs",
+                 verbose=True):
         """
         Initialize the simple strategy agent
         
@@ -32,6 +43,7 @@ class SimpleStrategyAgent:
             data_source: Source of data ('historical' or 'live')
             backtest_days: Number of days to use for backtesting
             log_dir: Directory to save logs and results
+            verbose: Print progress and results to stdout
         """
         self.symbol = symbol
         self.fast_period = fast_period
@@ -39,7 +51,11 @@ class SimpleStrategyAgent:
         self.data_source = data_source
         self.backtest_days = backtest_days
         self.log_dir = log_dir
-        self.data = None
+        self.verbose = verbose
+        self.arrays = None  # MarketArrays of the loaded OHLCV series
+        self.fast_ma = None
+        self.slow_ma = None
+        self._frame = None
         self.signals = None
         self.positions = None
         self.portfolio = None
@@ -47,10 +63,34 @@ class SimpleStrategyAgent:
         # Create log directory if it doesn't exist
         os.makedirs(log_dir, exist_ok=True)
         
-        print(f"Initializing simple strategy agent:")
-        print(f"  Symbol: {self.symbol}")
-        print(f"  Strategy: {self.fast_period}/{self.slow_period} MA Crossover")
-        print(f"  Data source: {self.data_source}")
+        self._log(f"Initializing simple strategy agent:")
+        self._log(f"  Symbol: {self.symbol}")
+        self._log(f"  Strategy: {self.fast_period}/{self.slow_period} MA Crossover")
+        self._log(f"  Data source: {self.data_source}")
+    
+    def _log(self, *args):
+        """Print only when the agent is verbose"""
+        if self.verbose:
+            print(*args)
+    
+    @property
+    def data(self):
+        """DataFrame view of the market data and moving averages, built on first access"""
+        if self.arrays is None:
+            return None
+        if self._frame is None:
+            extra = {}
+            if self.fast_ma is not None:
+                extra = {'fast_ma': self.fast_ma, 'slow_ma': self.slow_ma}
+            self._frame = self.arrays.to_frame(**extra)
+        return self._frame
+    
+    @data.setter
+    def data(self, df):
+        self.arrays = None if df is None else MarketArrays.from_frame(df)
+        self.fast_ma = None
+        self.slow_ma = None
+        self._frame = None
     
     def load_data(self):
         """Load historical or live data"""
@@ -61,141 +101,170 @@ class SimpleStrategyAgent:
     
     def _load_historical_data(self):
         """Load historical data for backtesting"""
-        print(f"Loading historical data for {self.symbol}...")
+        self._log(f"Loading historical data for {self.symbol}...")
         
         # Generate dates
         end_date = datetime.now()
         start_date = end_date - timedelta(days=self.backtest_days)
         dates = pd.date_range(start=start_date, end=end_date, freq='1h')
         
-        # Generate simulated price data
-        n = len(dates)
-        seed = np.random.randint(0, 10000)  # Random seed for reproducibility
-        np.random.seed(seed)
+        # The simulated series depends only on (symbol, length, seed) and the
+        # simulation itself, so reuse it across runs; the key covers the
+        # simulation's code and numpy's version so edits invalidate the cache
+        seed = zlib.crc32(self.symbol.encode())
+        code = self._simulate_prices.__code__
+        key_hasher = hashlib.sha256(f"{self.symbol}|{len(dates)}|{seed}|{np.__version__}|".encode())
+        key_hasher.update(code.co_code)
+        key_hasher.update(repr(code.co_consts).encode())
+        key = key_hasher.hexdigest()[:16]
+        cache_file = os.path.join(self.log_dir, f".cache_{key}.npz")
+        
+        if os.path.exists(cache_file):
+            with np.load(cache_file) as cached:
+                prices = {name: cached[name] for name in cached.files}
+            self._log(f"Using cached simulated data from {cache_file}")
+        else:
+            prices = self._simulate_prices(len(dates), seed)
+            tmp_file = cache_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                np.savez(f, **prices)
+            os.replace(tmp_file, cache_file)  # Never leave a partial cache file behind
+        
+        self.arrays = MarketArrays(timestamp=dates.to_numpy(), **prices)
+        self.fast_ma = None
+        self.slow_ma = None
+        self._frame = None
+        
+        self._log(f"Loaded {len(self.arrays)} historical data points")
+        
+        # Save the first and last few rows to a log file
+        log_file = os.path.join(self.log_dir, f"{self.symbol.replace('/', '_')}_data.log")
+        with open(log_file, 'w') as f:
+            f.write("=== First 5 rows ===\n")
+            f.write(str(self.data.head()) + "\n\n")
+            f.write("=== Last 5 rows ===\n")
+            f.write(str(self.data.tail()) + "\n")
+    
+    def _simulate_prices(self, n, seed):
+        """Simulate n hourly OHLCV bars from a seeded generator"""
+        # Generate simulated price data (one generator, noise drawn in bulk)
+        rng = np.random.default_rng(seed)
+        noise = rng.standard_normal(n)
+        rand01 = rng.random((2, n))  # Rows: high and low spreads
         
         # Start with a base price and add random walk
         base_price = 30000  # Starting price for BTC/USD
-        random_walk = np.random.randn(n).cumsum() * 100
+        random_walk = noise.cumsum() * 100
         trend = np.linspace(0, 2000, n)  # Add a slight upward trend
         
         close_values = base_price + random_walk + trend
-        high_values = close_values * (1 + 0.01 * np.random.rand(n))
-        low_values = close_values * (1 - 0.01 * np.random.rand(n))
-        open_values = close_values.copy()
+        high_values = close_values * (1 + 0.01 * rand01[0])
+        low_values = close_values * (1 - 0.01 * rand01[1])
         
-        # Shift open values
-        open_values = np.roll(open_values, 1)
-        open_values[0] = close_values[0] * (1 - 0.005 + 0.01 * np.random.rand())
+        # Shift open values: each bar opens at the previous close
+        open_values = np.empty_like(close_values)
+        open_values[1:] = close_values[:-1]
+        open_values[0] = close_values[0] * (1 - 0.005 + 0.01 * rng.random())
         
         # Generate volume with some randomness
-        volume_base = np.random.randint(100, 1000, size=n)
+        volume_base = rng.integers(100, 1000, size=n)
         volume_trend = np.sin(np.linspace(0, 10, n)) * 200 + 500  # Add cyclical pattern
         volume_values = volume_base + volume_trend
         
-        # Create DataFrame
-        self.data = pd.DataFrame({
-            'timestamp': dates,
+        return {
             'open': open_values,
             'high': high_values,
             'low': low_values,
             'close': close_values,
             'volume': volume_values
-        })
-        
-        print(f"Loaded {len(self.data)} historical data points")
-        
-        # Save the first and last few rows to a log file
-        log_file = os.path.join(self.log_dir, f"{self.symbol.replace('/', '_')}_data.log")
-        with open(log_file, 'w') as f:
-            f.write("=== First 5 rows ===\n")
-            f.write(str(self.data.head()) + "\n\n")
-            f.write("=== Last 5 rows ===\n")
-            f.write(str(self.data.tail()) + "\n")
+        }
     
     def _load_live_data(self):
         """Load live market data"""
-        print(f"Loading live data for {self.symbol}...")
+        self._log(f"Loading live data for {self.symbol}...")
         # In a real implementation, this would connect to an exchange API
         # For now, we'll just use the same simulated data
         self._load_historical_data()
-        print("Note: Using simulated data instead of live data")
+        self._log("Note: Using simulated data instead of live data")
     
     def generate_signals(self):
         """Generate trading signals based on moving average crossover"""
-        print("Generating trading signals...")
+        self._log("Generating trading signals...")
         
-        if self.data is None:
+        if self.arrays is None:
             self.load_data()
         
-        # Calculate moving averages
-        self.data['fast_ma'] = self.data['close'].rolling(window=self.fast_period).mean()
-        self.data['slow_ma'] = self.data['close'].rolling(window=self.slow_period).mean()
-        
-        # Initialize signals DataFrame
-        self.signals = pd.DataFrame(index=self.data.index)
-        self.signals['signal'] = 0.0
+        # Calculate moving averages (running-sum SMA, cost independent of the window)
+        close = self.arrays.close
+        self.fast_ma = fast_sma(close, self.fast_period)
+        self.slow_ma = fast_sma(close, self.slow_period)
+        self._frame = None  # Rebuild the DataFrame view with the new averages
         
         # Generate buy/sell signals
         # Buy signal (1) when fast MA crosses above slow MA
         # Sell signal (-1) when fast MA crosses below slow MA
-        self.signals['signal'] = np.where(self.data['fast_ma'] > self.data['slow_ma'], 1.0, 0.0)
+        signal = (self.fast_ma > self.slow_ma).astype(np.int8)
+        
+        # Generate trading orders (1 for buy, -1 for sell); the first bar has no order
+        position = np.empty_like(signal)
+        position[:1] = 0
+        position[1:] = signal[1:] - signal[:-1]
         
-        # Generate trading orders (1 for buy, -1 for sell)
-        self.signals['position'] = self.signals['signal'].diff()
+        self.signals = pd.DataFrame({'signal': signal, 'position': position})
         
-        print(f"Generated {len(self.signals[self.signals['position'] != 0])} trading signals")
+        self._log(f"Generated {np.count_nonzero(position != 0)} trading signals")
     
     def backtest_strategy(self, initial_capital=10000.0):
         """Backtest the strategy with historical data"""
-        print(f"Backtesting strategy with {initial_capital} initial capital...")
+        self._log(f"Backtesting strategy with {initial_capital} initial capital...")
         
         if self.signals is None:
             self.generate_signals()
         
-        # Create a DataFrame for positions and portfolio
-        self.positions = pd.DataFrame(index=self.signals.index).fillna(0.0)
-        self.portfolio = pd.DataFrame(index=self.signals.index).fillna(0.0)
+        close = self.arrays.close
+        signal = self.signals['signal'].to_numpy()
+        orders = self.signals['position'].to_numpy()
+        
+        # The whole portfolio table lives in one column-major buffer; each column is a contiguous view
+        table = np.empty((len(close), len(PORTFOLIO_COLUMNS)), order='F')
+        asset, cash, trade_costs, total = (table[:, i] for i in range(4))
         
         # Store positions and asset values
-        self.positions['position'] = self.signals['signal']
-        self.positions['asset'] = self.positions['position'] * self.data['close']
+        np.multiply(signal, close, out=asset)
         
         # Initialize portfolio with initial capital
-        self.portfolio['positions'] = self.positions['asset']
-        self.portfolio['cash'] = initial_capital - (self.signals['position'] * self.data['close']).cumsum()
+        np.subtract(initial_capital, np.cumsum(orders * close), out=cash)
         
         # Add transaction costs (0.1% per trade)
         trade_cost = 0.001
-        trades = self.signals['position'].abs()
-        self.portfolio['trade_costs'] = trades * self.data['close'] * trade_cost
-        self.portfolio['cash'] = self.portfolio['cash'] - self.portfolio['trade_costs'].cumsum()
+        np.multiply(np.abs(orders) * close, trade_cost, out=trade_costs)
+        cash -= np.cumsum(trade_costs)
         
         # Calculate total portfolio value
-        self.portfolio['total'] = self.portfolio['positions'] + self.portfolio['cash']
-        
-        # Calculate returns
-        self.portfolio['returns'] = self.portfolio['total'].pct_change()
+        np.add(asset, cash, out=total)
         
-        # Calculate cumulative returns
-        self.portfolio['cumulative_returns'] = (1 + self.portfolio['returns']).cumprod()
+        # Calculate returns, cumulative returns and drawdown
+        for i, column in enumerate(portfolio_stats(total), start=4):
+            table[:, i] = column
+        returns = table[:, 4]
+        drawdown = table[:, 7]
         
-        # Calculate drawdown
-        self.portfolio['peak'] = self.portfolio['total'].cummax()
-        self.portfolio['drawdown'] = (self.portfolio['total'] - self.portfolio['peak']) / self.portfolio['peak']
+        self.positions = pd.DataFrame({'position': signal, 'asset': asset})
+        self.portfolio = pd.DataFrame(table, columns=PORTFOLIO_COLUMNS, copy=False)
         
         # Calculate performance metrics
-        total_return = (self.portfolio['total'].iloc[-1] / initial_capital) - 1.0
+        total_return = (total[-1] / initial_capital) - 1.0
         annual_return = total_return / (self.backtest_days / 365)
-        sharpe_ratio = np.sqrt(252) * self.portfolio['returns'].mean() / self.portfolio['returns'].std()
-        max_drawdown = self.portfolio['drawdown'].min()
-        win_rate = len(self.portfolio[self.portfolio['returns'] > 0]) / len(self.portfolio[self.portfolio['returns'] != 0])
+        sharpe_ratio = np.sqrt(252) * np.nanmean(returns) / np.nanstd(returns, ddof=1)
+        max_drawdown = np.nanmin(drawdown)
+        win_rate = np.count_nonzero(returns > 0) / np.count_nonzero(returns != 0)
         
-        print(f"Backtest Results:")
-        print(f"  Total Return: {total_return:.2%}")
-        print(f"  Annual Return: {annual_return:.2%}")
-        print(f"  Sharpe Ratio: {sharpe_ratio:.2f}")
-        print(f"  Max Drawdown: {max_drawdown:.2%}")
-        print(f"  Win Rate: {win_rate:.2%}")
+        self._log(f"Backtest Results:")
+        self._log(f"  Total Return: {total_return:.2%}")
+        self._log(f"  Annual Return: {annual_return:.2%}")
+        self._log(f"  Sharpe Ratio: {sharpe_ratio:.2f}")
+        self._log(f"  Max Drawdown: {max_drawdown:.2%}")
+        self._log(f"  Win Rate: {win_rate:.2%}")
         
         # Save results to log file
         log_file = os.path.join(self.log_dir, f"{self.symbol.replace('/', '_')}_backtest.log")
@@ -209,8 +278,8 @@ class SimpleStrategyAgent:
             f.write(f"Sharpe Ratio: {sharpe_ratio:.2f}\n")
             f.write(f"Max Drawdown: {max_drawdown:.2%}\n")
             f.write(f"Win Rate: {win_rate:.2%}\n\n")
-            f.write(f"Final Portfolio Value: ${self.portfolio['total'].iloc[-1]:.2f}\n")
-            f.write(f"Number of Trades: {len(self.signals[self.signals['position'] != 0])}\n")
+            f.write(f"Final Portfolio Value: ${total[-1]:.2f}\n")
+            f.write(f"Number of Trades: {np.count_nonzero(orders != 0)}\n")
         
         return {
             'total_return': total_return,
@@ -223,18 +292,20 @@ class SimpleStrategyAgent:
     def plot_results(self):
         """Plot the backtest results"""
         if self.portfolio is None:
-            print("No backtest results to plot. Run backtest_strategy() first.")
+            self._log("No backtest results to plot. Run backtest_strategy() first.")
             return
         
-        print("Plotting backtest results...")
+        self._log("Plotting backtest results...")
         
         # Create figure with subplots
-        fig, axes = plt.subplots(3, 1, figsize=(12, 16), sharex=True)
+        fig, axes = plt.subplots(3, 1, figsize=(12, 16), sharex=True, dpi=80)
         
-        # Plot price and moving averages
-        axes[0].plot(self.data.index, self.data['close'], label='Price')
-        axes[0].plot(self.data.index, self.data['fast_ma'], label=f'{self.fast_period} MA')
-        axes[0].plot(self.data.index, self.data['slow_ma'], label=f'{self.slow_period} MA')
+        # Plot price and moving averages (about 2000 points is all the figure can resolve)
+        stride = max(1, len(self.data) // 2000)
+        price = self.data.iloc[::stride]
+        axes[0].plot(price.index, price['close'], label='Price')
+        axes[0].plot(price.index, price['fast_ma'], label=f'{self.fast_period} MA')
+        axes[0].plot(price.index, price['slow_ma'], label=f'{self.slow_period} MA')
         
         # Plot buy/sell signals
         buy_signals = self.signals[self.signals['position'] == 1.0]
@@ -271,15 +342,36 @@ class SimpleStrategyAgent:
         # Save the plot
         plot_file = os.path.join(self.log_dir, f"{self.symbol.replace('/', '_')}_backtest_plot.png")
         plt.savefig(plot_file)
-        print(f"Plot saved to {plot_file}")
+        self._log(f"Plot saved to {plot_file}")
         
         # Close the plot to free memory
         plt.close(fig)
 
-def main():
+def _run_symbol(symbol, args, plot=False, verbose=True):
+    """Backtest one symbol end to end (module level so worker processes can run it)"""
+    agent = SimpleStrategyAgent(
+        symbol=symbol,
+        fast_period=args.fast,
+        slow_period=args.slow,
+        data_source=args.data,
+        backtest_days=args.days,
+        log_dir=args.log_dir,
+        verbose=verbose
+    )
+    
+    agent.load_data()
+    agent.generate_signals()
+    results = agent.backtest_strategy(initial_capital=args.capital)
+    if plot:
+        agent.plot_results()
+    return {'symbol': symbol, **results}
+
+def main(plot=False):
     parser = argparse.ArgumentParser(description='Simple Moving Average Crossover Strategy')
     parser.add_argument('--symbol', type=str, default="BTC/USD",
                         help='Trading pair symbol (default: BTC/USD)')
+    parser.add_argument('--symbols', type=str, default=None,
+                        help='Comma-separated symbols to backtest in parallel (overrides --symbol)')
     parser.add_argument('--fast', type=int, default=20,
                         help='Fast moving average period (default: 20)')
     parser.add_argument('--slow', type=int, default=50,
@@ -292,22 +384,28 @@ def main():
                         help='Initial capital for backtesting (default: 10000.0)')
     parser.add_argument('--log-dir', type=str, default="logs",
                         help='Directory to save logs and results (default: logs)')
+    parser.add_argument('--plot', action='store_true',
+                        help='Save a plot of the backtest results')
     
     args = parser.parse_args()
+    plot = plot or args.plot
     
-    agent = SimpleStrategyAgent(
-        symbol=args.symbol,
-        fast_period=args.fast,
-        slow_period=args.slow,
-        data_source=args.data,
-        backtest_days=args.days,
-        log_dir=args.log_dir
-    )
-    
-    agent.load_data()
-    agent.generate_signals()
-    agent.backtest_strategy(initial_capital=args.capital)
-    agent.plot_results()
+    symbols = [s.strip() for s in args.symbols.split(',') if s.strip()] if args.symbols else [args.symbol]
+    if len(symbols) == 1:
+        _run_symbol(symbols[0], args, plot)
+    else:
+        # Backtests are independent; run one per process and report them together
+        processes = min(len(symbols), os.cpu_count() or 1)
+        print(f"Backtesting {len(symbols)} symbols on {processes} processes...")
+        with multiprocessing.Pool(processes=processes) as pool:
+            results = pool.starmap(_run_symbol, [(symbol, args, plot, False) for symbol in symbols])
+        
+        summary = pd.DataFrame(results)
+        print(summary.to_string(index=False))
+        
+        summary_file = os.path.join(args.log_dir, "backtest_summary.csv")
+        summary.to_csv(summary_file, index=False)
+        print(f"Summary saved to {summary_file}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -7,13 +7,16 @@ It's used to test resource monitoring and determine if a cloud GPU is needed.
 """
 
 import os
-import sys
 import time
 import random
 import argparse
+from dataclasses import fields
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from _indicators import fast_sma
+from _kernels import rsi as _rsi_kernel
+from market_arrays import MarketArrays
 
 class TestAgent:
     """
@@ -32,14 +35,27 @@ class TestAgent:
         self.cpu_intensity = min(max(cpu_intensity, 0), 100)
         self.memory_mb = memory_mb
         self.duration = duration
-        self.data = None
-        self.models = []
+        self.arrays = None  # MarketArrays of the simulated OHLCV series
+        self.sma_20 = None
+        self.sma_50 = None
+        self.rsi = None
+        self._ballast = None
         
         print(f"Initializing test agent with:")
         print(f"  CPU intensity: {self.cpu_intensity}%")
         print(f"  Memory allocation: {self.memory_mb} MB")
         print(f"  Duration: {self.duration} seconds")
     
+    @property
+    def data(self):
+        """DataFrame view of the market data and indicators"""
+        if self.arrays is None:
+            return None
+        extra = {}
+        if self.rsi is not None:
+            extra = {'sma_20': self.sma_20, 'sma_50': self.sma_50, 'rsi': self.rsi}
+        return self.arrays.to_frame(**extra)
+    
     def generate_test_data(self):
         """Generate test market data"""
         print("Generating test market data...")
@@ -56,35 +72,39 @@ class TestAgent:
         low_values = close_values * (1 - 0.02 * np.random.rand(n))
         volume_values = np.random.randint(1000, 10000, size=n)
         
-        # Create DataFrame first
-        self.data = pd.DataFrame({
-            'timestamp': dates,
-            'close': close_values,
-            'high': high_values,
-            'low': low_values,
-            'volume': volume_values
-        })
+        # Each bar opens at the previous close
+        open_values = np.empty_like(close_values)
+        open_values[0] = close_values[0]
+        open_values[1:] = close_values[:-1]
         
-        # Now we can use pandas shift on the DataFrame
-        self.data['open'] = self.data['close'].shift(1).bfill()
+        self.arrays = MarketArrays(
+            timestamp=dates.to_numpy(),
+            open=open_values,
+            high=high_values,
+            low=low_values,
+            close=close_values,
+            volume=volume_values
+        )
         
         # Allocate memory based on memory_mb
         target_bytes = self.memory_mb * 1024 * 1024
-        current_bytes = sys.getsizeof(self.data)
+        current_bytes = self.arrays.nbytes
         
-        # Create additional dataframes to reach target memory
+        # Pad with one float64 block shaped like the data, filled with noise so the pages are resident
         if current_bytes < target_bytes:
-            remaining_bytes = target_bytes - current_bytes
-            copies_needed = int(remaining_bytes / current_bytes) + 1
+            cols = len(fields(self.arrays))
+            target_rows = (target_bytes - current_bytes) // (cols * 8)
             
             print(f"Allocating {self.memory_mb} MB of memory...")
-            for i in range(copies_needed):
-                # Create a copy with slight modifications to prevent optimization
-                copy_data = self.data.copy()
-                copy_data['close'] = copy_data['close'] * (1 + 0.001 * random.random())
-                self.models.append(copy_data)
-        
-        print(f"Generated data with {len(self.data)} rows")
+            self._ballast = np.empty((target_rows, cols), order='F')
+            rng = np.random.default_rng()
+            chunk_rows = 1 << 20
+            for j in range(cols):
+                column = self._ballast[:, j]
+                for start in range(0, target_rows, chunk_rows):
+                    rng.standard_normal(out=column[start:start + chunk_rows])
+        
+        print(f"Generated data with {len(self.arrays)} rows")
     
     def run_cpu_intensive_task(self, seconds):
         """
@@ -102,17 +122,21 @@ class TestAgent:
         
         start_time = time.time()
         
+        # Matrix operations are CPU-intensive; allocate the operands once and reuse them
+        size = 50  # Matrix size
+        a = np.random.rand(size, size)
+        b = np.random.rand(size, size)
+        c = np.empty_like(a)
+        
         # Perform CPU-intensive calculations
         for i in range(total_iterations):
-            # Matrix operations are CPU-intensive
-            size = 50  # Matrix size
-            a = np.random.rand(size, size)
-            b = np.random.rand(size, size)
-            c = np.dot(a, b)  # Matrix multiplication
+            np.dot(a, b, out=c)  # Matrix multiplication
+            c *= 1e-9
+            a += c  # Feed the result back so every product depends on the last
             
             # Add some randomness to prevent compiler optimizations
             if random.random() < 0.0001:
-                print(f"Matrix sum: {c.sum():.2f}")
+                print(f"Matrix sum: {a.sum():.2f}")
             
             # Check if we've exceeded the requested time
             if i % 1000 == 0 and time.time() - start_time >= seconds:
@@ -125,9 +149,19 @@ class TestAgent:
         """Simulate trading activity"""
         print("Starting trading simulation...")
         
-        if self.data is None:
+        if self.arrays is None:
             self.generate_test_data()
         
+        # Simulate data processing (low CPU); the data is static, so indicators
+        # and signals are computed once rather than on every iteration
+        close = self.arrays.close
+        self.sma_20 = fast_sma(close, 20)
+        self.sma_50 = fast_sma(close, 50)
+        self.rsi = self._calculate_rsi(close, 14)
+        
+        # Simulate signal generation (medium CPU)
+        signals = self._generate_signals()
+        
         start_time = time.time()
         end_time = start_time + self.duration
         
@@ -136,14 +170,6 @@ class TestAgent:
             iteration += 1
             print(f"Trading iteration {iteration}...")
             
-            # Simulate data processing (low CPU)
-            self.data['sma_20'] = self.data['close'].rolling(window=20).mean()
-            self.data['sma_50'] = self.data['close'].rolling(window=50).mean()
-            self.data['rsi'] = self._calculate_rsi(self.data['close'], 14)
-            
-            # Simulate signal generation (medium CPU)
-            signals = self._generate_signals()
-            
             # Simulate model training/prediction (high CPU)
             cpu_time = 2 + (self.cpu_intensity / 100) * 8  # 2-10 seconds based on intensity
             self.run_cpu_intensive_task(cpu_time)
@@ -159,65 +185,33 @@ class TestAgent:
     
     def _calculate_rsi(self, prices, window=14):
         """Calculate RSI indicator"""
-        # Convert to numpy array for calculations
-        price_array = prices.values
-        deltas = np.diff(price_array)
+        price_array = np.asarray(prices, dtype=np.float64)
         
         # Handle empty arrays
-        if len(deltas) < window+1:
+        if len(price_array) < window+2:
             return np.zeros_like(price_array)
-            
-        seed = deltas[:window+1]
-        up = seed[seed >= 0].sum()/window if any(seed >= 0) else 0
-        down = -seed[seed < 0].sum()/window if any(seed < 0) else 0.0001  # Avoid division by zero
-        
-        rs = up/down
-        rsi = np.zeros_like(price_array)
-        rsi[:window] = 100. - 100./(1. + rs)
-        
-        for i in range(window, len(price_array)):
-            delta = deltas[i-1]
-            if delta > 0:
-                upval = delta
-                downval = 0.
-            else:
-                upval = 0.
-                downval = -delta
-            
-            up = (up * (window - 1) + upval) / window
-            down = (down * (window - 1) + downval) / window
-            
-            # Avoid division by zero
-            if down == 0:
-                down = 0.0001
-                
-            rs = up/down
-            rsi[i] = 100. - 100./(1. + rs)
-        
-        return pd.Series(rsi, index=prices.index)
+        
+        return _rsi_kernel(price_array, window)
     
     def _generate_signals(self):
         """Generate trading signals"""
-        signals = pd.DataFrame(index=self.data.index)
-        signals['signal'] = 0
-        
         # Simple moving average crossover strategy
-        signals.loc[self.data['sma_20'] > self.data['sma_50'], 'signal'] = 1
-        signals.loc[self.data['sma_20'] < self.data['sma_50'], 'signal'] = -1
+        signals = np.zeros(len(self.arrays), dtype=np.int8)
+        signals[self.sma_20 > self.sma_50] = 1
+        signals[self.sma_20 < self.sma_50] = -1
         
         # Add RSI filter
-        signals.loc[self.data['rsi'] > 70, 'signal'] = -1
-        signals.loc[self.data['rsi'] < 30, 'signal'] = 1
+        signals[self.rsi > 70] = -1
+        signals[self.rsi < 30] = 1
         
         return signals
     
     def _execute_trades(self, signals):
         """Simulate trade execution"""
         # Just a placeholder for a real trading execution
-        positions = signals['signal'].diff()
-        trades = positions[positions != 0]
-        if len(trades) > 0:
-            print(f"Executed {len(trades)} trades")
+        n_trades = int(np.count_nonzero(signals[1:] != signals[:-1]))
+        if n_trades > 0:
+            print(f"Executed {n_trades} trades")
 
 def main():
     parser = argparse.ArgumentParser(description='Test agent with configurable resource usage')
@@ -1,6 +1,14 @@
 import requests
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+from sqlalchemy import create_engine, event, Column, Integer, String, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -8,9 +16,27 @@ from sqlalchemy.orm import sessionmaker
 LIMEX_API_KEY = os.getenv("LIMEX_API_KEY")  # Set this in your .env file
 LIMEX_API_URL = "https://hub.limex.com/v1/candles/"  # Update as needed
 
+# Shared session so repeated symbol fetches reuse the TCP/TLS connection
+_session = requests.Session()
+_session.headers["Accept-Encoding"] = "gzip"
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 # SQLite database setup
 DATABASE_URL = "sqlite:///./database.db"
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL journal with relaxed syncing for faster bulk writes"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -35,9 +61,11 @@ def fetch_limex_data(symbol: str, timeframe: str = "1h"):
     headers = {"Authorization": f"Bearer {LIMEX_API_KEY}"}
     params = {"symbol": symbol, "timeframe": timeframe}
     
-    response = requests.get(LIMEX_API_URL, headers=headers, params=params)
+    response = _session.get(LIMEX_API_URL, headers=headers, params=params, timeout=10)
     
     if response.status_code == 200:
+        if ORJSON_AVAILABLE:
+            return orjson.loads(response.content)
         return response.json()
     else:
         print(f"Error: {response.status_code}, {response.text}")
@@ -45,19 +73,21 @@ def fetch_limex_data(symbol: str, timeframe: str = "1h"):
 
 # Function to store fetched data in SQLite
 def store_market_data(data, symbol):
-    db = SessionLocal()
-    
-    for candle in data:
-        new_entry = MarketData(
-            symbol=symbol,
-            timestamp=candle["timestamp"],
-            open_price=candle["open"],
-            high_price=candle["high"],
-            low_price=candle["low"],
-            close_price=candle["close"],
-            volume=candle["volume"]
-        )
-        db.add(new_entry)
+    rows = [
+        {
+            "symbol": symbol,
+            "timestamp": candle["timestamp"],
+            "open_price": candle["open"],
+            "high_price": candle["high"],
+            "low_price": candle["low"],
+            "close_price": candle["close"],
+            "volume": candle["volume"]
+        }
+        for candle in data
+    ]
+    if not rows:
+        return
     
-    db.commit()
-    db.close()
+    # One executemany in a single transaction instead of an ORM object per candle
+    with engine.begin() as conn:
+        conn.execute(MarketData.__table__.insert(), rows)
@@ -11,9 +11,18 @@ import sys
 import time
 import datetime
 import shutil
-import subprocess
 import argparse
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import mmap
+import struct
+import contextlib
+import zipfile
+import tarfile
+import multiprocessing
 from pathlib import Path
 import logging
 
@@ -30,6 +39,8 @@ logging.basicConfig(
 # Import AWS SDK
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
     from botocore.exceptions import ClientError
     AWS_AVAILABLE = True
 except ImportError:
@@ -37,6 +48,13 @@ except ImportError:
     logging.warning("boto3 not installed. AWS S3 backup disabled.")
     logging.warning("Install with: pip install boto3")
 
+# zstd-compressed .znpy archives are optional
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
 # Try to import AWS configuration
 try:
     from aws_config import (
@@ -52,23 +70,282 @@ except ImportError:
     CONFIG_AVAILABLE = False
     logging.warning("AWS configuration not found. Using command line arguments.")
     # Set default values
+    AWS_ACCESS_KEY_ID = None
+    AWS_SECRET_ACCESS_KEY = None
     AWS_REGION = None
     S3_BUCKET_NAME = None
     MAX_BACKUPS = 5
     INCLUDE_VENV = False
 
+# Incremental backups: content-addressed blobs plus one manifest per run
+STORE_DIRNAME = "backup_store"
+STATE_FILENAME = "backup_manifest.json"  # (mtime, size) -> sha256 cache from the last run
+MMAP_THRESHOLD = 1024 * 1024  # Hash files larger than this through mmap
+MMAP_MAX = 256 * 1024 * 1024  # ...and stream files larger than this, to keep RSS bounded
+HASH_BLOCK = 8 * 1024 * 1024
+S3_PREFIX = "trading_system_backups"
+UPLOAD_CONCURRENCY = 4  # Parallel uploads for incremental blobs
+SMALL_UPLOAD_THRESHOLD = 5 * 1024 * 1024  # Below this a single PutObject beats a managed transfer
+# Every object is encrypted at rest. Full archives are large and rarely read, so
+# they go to STANDARD_IA; incremental blobs stay STANDARD because IA bills each
+# object as at least 128 KB.
+S3_UPLOAD_ARGS = {'ServerSideEncryption': 'AES256'}
+S3_ARCHIVE_ARGS = {**S3_UPLOAD_ARGS, 'StorageClass': 'STANDARD_IA'}
+
+# Managed uploads: multipart from 8 MB in 16 MB parts, 10 parts in flight
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True
+) if AWS_AVAILABLE else None
+SENSITIVE_FILES = [".env", "client_secrets.json", "credentials.json"]
+# Contents of a --test backup
+ESSENTIAL_FILES = (
+    ".env",
+    ".gitignore",
+    "README.md",
+    "DEVELOPMENT_NOTES.md",
+    "tools/backup/aws_config.py",
+    "tools/backup/backup_to_s3.py",
+    "tools/backup/schedule_s3_backup.py",
+    "tools/backup/README_AWS.md",
+)
+
+# Skipped by every backup format; --exclude and --exclude-ext add to these
+VENV_DIRS = {"venv", ".venv"}
+DEFAULT_EXCLUDE_DIRS = VENV_DIRS | {
+    "__pycache__", ".git", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    "node_modules", "dist", "build", ".tox", ".idea", ".vscode"
+}
+DEFAULT_EXCLUDE_EXTS = {".pyc", ".pyo"}
+
+# Full ZIP archives
+ZIP_COMPRESSLEVEL = 6
+# Already-compressed formats are stored as-is; deflating them again costs CPU for ~0 gain
+COMPRESSED_EXTS = {
+    '.zip', '.gz', '.bz2', '.xz', '.zst', '.7z', '.png', '.jpg', '.jpeg', '.webp',
+    '.mp4', '.webm', '.mp3', '.flac', '.whl', '.parquet', '.pdf'
+}
+COPY_BUFFER = 8 * 1024 * 1024  # Userspace fallback when the kernel can't copy between files
+
+# Zip records written when merging shards (PKWARE APPNOTE 4.3)
+ZIP_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+ZIP_CENTRAL_DIR = struct.Struct('<4s4B4HL2L5H2L')
+ZIP_END_OF_CD = struct.Struct('<4s4H2LH')
+ZIP64_END_OF_CD = struct.Struct('<4sQ2H2L4Q')
+ZIP64_LOCATOR = struct.Struct('<4sLQL')
+ZIP64_LIMIT = (1 << 31) - 1  # Same threshold as zipfile: larger values go in ZIP64 records
+
+# Full .znpy archives: header, optional zstd dictionary, one zstd frame per
+# file, JSON index, trailer. Version 1 archives have no dictionary and a bare
+# list as their index.
+ZNPY_MAGIC = b"ZNPY\x00\x00\x00\x02"
+ZNPY_MAGIC_V1 = b"ZNPY\x00\x00\x00\x01"
+ZNPY_TRAILER = struct.Struct('<Q8s')  # Offset of the JSON index, magic
+ZSTD_LEVEL = 3
+ZSTD_DICT_SIZE = 16 * 1024
+# With fewer small files, or less sample data than zstd's ~100x the dictionary
+# size, the dictionary costs more than it saves
+ZSTD_DICT_MIN_FILES = 100
+ZSTD_DICT_MIN_SAMPLE_BYTES = 100 * ZSTD_DICT_SIZE
+ZSTD_DICT_MAX_SAMPLE = 128 * 1024  # Only files up to this size are sampled (large files don't benefit)
+ZSTD_DICT_SAMPLE_BYTES = 16 * 1024 * 1024
+READ_CHUNK = 1024 * 1024
+READ_AHEAD_DEPTH = 64  # Chunks the read-ahead thread may queue for the compressor
+S3_PART_SIZE = 8 * 1024 * 1024  # Multipart upload part size for streamed archives (S3 minimum is 5 MB)
+S3_PART_QUEUE = 8  # Parts buffered between the compressor and the uploader thread
+ARCHIVE_SUFFIXES = (".zip", ".znpy", ".tar.zst")
+
 def get_project_root():
     """Get the root directory of the trading system project"""
     # This script is in tools/backup, so go up two levels
     return Path(__file__).parent.parent.parent
 
-def create_backup_archive(output_dir=None, include_venv=False):
+def _compress_shard(shard_path, project_root, files):
+    """Write one subset of the backup files to its own zip (runs in a worker process)"""
+    with zipfile.ZipFile(shard_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zf:
+        for rel_path in files:
+            compress_type = zipfile.ZIP_STORED if os.path.splitext(rel_path)[1].lower() in COMPRESSED_EXTS else None
+            zf.write(os.path.join(project_root, rel_path), arcname=rel_path, compress_type=compress_type)
+    return shard_path
+
+def _fastcopy(src, offset, dst, length):
+    """
+    Append `length` bytes of `src` starting at `offset` to `dst`, in the kernel where possible
+    
+    Tries os.copy_file_range, then os.sendfile, then a buffered copy, each
+    picking up where the previous one stopped. Both arguments are open
+    binary files; `dst` is left positioned at the end of the copied range.
+    """
+    dst.flush()
+    dst_offset = dst.tell()
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    copied = 0
+    
+    try:
+        while copied < length:
+            n = os.copy_file_range(src_fd, dst_fd, length - copied, offset + copied, dst_offset + copied)
+            if n == 0:
+                break
+            copied += n
+    except (AttributeError, OSError):
+        pass  # Not Linux, or not supported between these files
+    
+    if copied < length:
+        try:
+            os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+            while copied < length:
+                n = os.sendfile(dst_fd, src_fd, offset + copied, length - copied)
+                if n == 0:
+                    break
+                copied += n
+        except (AttributeError, OSError):
+            pass
+    
+    if copied < length:
+        src.seek(offset + copied)
+        dst.seek(dst_offset + copied)
+        while copied < length:
+            chunk = src.read(min(length - copied, COPY_BUFFER))
+            if not chunk:
+                raise EOFError(f"{src.name} ended {length - copied} bytes early")
+            dst.write(chunk)
+            copied += len(chunk)
+    
+    dst.seek(dst_offset + length)
+
+def _strip_zip64_extra(extra):
+    """Drop ZIP64 (0x0001) records from a zip extra field"""
+    kept = []
+    i = 0
+    while i + 4 <= len(extra):
+        header_id, size = struct.unpack_from('<HH', extra, i)
+        if header_id != 0x0001:
+            kept.append(extra[i:i + 4 + size])
+        i += 4 + size
+    return b''.join(kept)
+
+def _central_dir_record(info, name, dos_time, dos_date, offset):
+    """Build the central directory record for a member whose local header is at `offset`"""
+    # Sizes and the offset that don't fit in 32 bits move to a ZIP64 extra
+    # record, in the order the format requires; the shard's own ZIP64 record
+    # described its old offset, so it is replaced
+    file_size, compress_size = info.file_size, info.compress_size
+    zip64 = []
+    if file_size > ZIP64_LIMIT:
+        zip64.append(file_size)
+        file_size = 0xFFFFFFFF
+    if compress_size > ZIP64_LIMIT:
+        zip64.append(compress_size)
+        compress_size = 0xFFFFFFFF
+    if offset > ZIP64_LIMIT:
+        zip64.append(offset)
+        offset = 0xFFFFFFFF
+    
+    extra = _strip_zip64_extra(info.extra)
+    extract_version = info.extract_version
+    if zip64:
+        extra = struct.pack(f'<HH{len(zip64)}Q', 0x0001, 8 * len(zip64), *zip64) + extra
+        extract_version = max(extract_version, 45)
+    
+    return ZIP_CENTRAL_DIR.pack(
+        b'PK\x01\x02', info.create_version, info.create_system, extract_version, 0,
+        info.flag_bits, info.compress_type, dos_time, dos_date,
+        info.CRC, compress_size, file_size,
+        len(name), len(extra), len(info.comment), 0, info.internal_attr, info.external_attr,
+        offset
+    ) + name + extra + info.comment
+
+def _write_central_dir(out, records):
+    """Write the central directory and end records (ZIP64 ones where needed) at the end of `out`"""
+    start = out.tell()
+    out.write(b''.join(records))
+    size = out.tell() - start
+    count = len(records)
+    
+    if count > 0xFFFF or size > ZIP64_LIMIT or start > ZIP64_LIMIT:
+        zip64_end = out.tell()
+        out.write(ZIP64_END_OF_CD.pack(b'PK\x06\x06', ZIP64_END_OF_CD.size - 12, 45, 45, 0, 0,
+                                       count, count, size, start))
+        out.write(ZIP64_LOCATOR.pack(b'PK\x06\x07', 0, zip64_end, 1))
+        count, size, start = min(count, 0xFFFF), min(size, 0xFFFFFFFF), min(start, 0xFFFFFFFF)
+    out.write(ZIP_END_OF_CD.pack(b'PK\x05\x06', 0, 0, count, count, size, start, 0))
+
+def _merge_zip_shards(backup_path, shard_paths):
+    """
+    Concatenate the members of several zips into one without recompressing
+    
+    Members are emitted in name order across all shards, so the archive
+    layout doesn't depend on how files were balanced between workers. Each
+    member's local header and compressed data are copied verbatim, the
+    data without passing through userspace where the kernel allows it (see
+    _fastcopy), and a single central directory (with ZIP64 records where
+    needed) is written for the relocated members. Only the documented
+    ZipInfo fields of the shards are read; nothing of ZipFile's writer
+    state is touched.
+    """
+    with contextlib.ExitStack() as stack:
+        members = []
+        for shard_path in shard_paths:
+            shard = stack.enter_context(zipfile.ZipFile(shard_path))
+            raw = stack.enter_context(open(shard_path, 'rb'))
+            members.extend((info, raw) for info in shard.infolist())
+        members.sort(key=lambda member: member[0].filename)
+        
+        records = []
+        with open(backup_path, 'wb') as out:
+            for info, raw in members:
+                raw.seek(info.header_offset)
+                header = raw.read(ZIP_LOCAL_HEADER.size)
+                fields = ZIP_LOCAL_HEADER.unpack(header)
+                if fields[0] != b'PK\x03\x04':
+                    raise zipfile.BadZipFile(f"Bad local header for {info.filename} in {raw.name}")
+                dos_time, dos_date = fields[4], fields[5]
+                name_len, extra_len = fields[9], fields[10]
+                name = raw.read(name_len)
+                
+                offset = out.tell()
+                out.write(header + name)
+                _fastcopy(raw, raw.tell(), out, extra_len + info.compress_size)
+                records.append(_central_dir_record(info, name, dos_time, dos_date, offset))
+            
+            _write_central_dir(out, records)
+
+def _write_zip_parallel(backup_path, project_root, files, jobs):
+    """Compress the files ({rel_path: stat}) into backup_path using up to `jobs` processes"""
+    if jobs <= 1 or len(files) < 2:
+        _compress_shard(str(backup_path), str(project_root), sorted(files))
+        return
+    
+    # Balance the shards by size: largest files first, each to the lightest shard
+    shards = [[] for _ in range(min(jobs, len(files)))]
+    loads = [0] * len(shards)
+    for rel_path in sorted(files, key=lambda f: files[f].st_size, reverse=True):
+        i = loads.index(min(loads))
+        shards[i].append(rel_path)
+        loads[i] += files[rel_path].st_size
+    
+    shard_paths = [str(backup_path.with_name(f".{backup_path.stem}_shard{i}.zip")) for i in range(len(shards))]
+    try:
+        with multiprocessing.Pool(processes=len(shards)) as pool:
+            pool.starmap(_compress_shard, [(path, str(project_root), shard) for path, shard in zip(shard_paths, shards)])
+        _merge_zip_shards(backup_path, shard_paths)
+    finally:
+        for path in shard_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+def create_backup_archive(output_dir=None, include_venv=False, jobs=None, exclude_dirs=(), exclude_exts=()):
     """
     Create a backup archive of the trading system
     
     Args:
         output_dir: Directory to save the backup archive (default: project root)
         include_venv: Whether to include the virtual environment in the backup
+        jobs: Number of processes compressing in parallel (default: CPU count)
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
         
     Returns:
         Path to the created backup archive
@@ -88,61 +365,612 @@ def create_backup_archive(output_dir=None, include_venv=False):
     
     logging.info(f"Creating backup archive: {backup_path}")
     
-    # Determine which directories to exclude
-    exclude_dirs = []
-    if not include_venv:
-        exclude_dirs.append("venv")
-    
     # Create the backup archive
     try:
-        # Change to the project root directory
-        os.chdir(project_root)
-        
-        # Use git to get a list of all tracked files
-        git_files = subprocess.check_output(
-            ["git", "ls-files"], 
-            text=True
-        ).splitlines()
-        
-        # Also include untracked files except those in excluded directories
-        all_files = []
-        for root, dirs, files in os.walk("."):
-            # Skip excluded directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
-            
-            for file in files:
-                file_path = os.path.join(root, file)
-                # Normalize path format
-                file_path = file_path.replace("\\", "/")
-                if file_path.startswith("./"):
-                    file_path = file_path[2:]
-                all_files.append(file_path)
-        
-        # Create a set of all files to include in the backup
-        backup_files = set(all_files)
-        
-        # Ensure sensitive files are included (even if they're in .gitignore)
-        sensitive_files = [".env", "client_secrets.json", "credentials.json"]
-        for file in sensitive_files:
-            if os.path.exists(file):
+        backup_files = scan_backup_files(project_root, include_venv, exclude_dirs, exclude_exts)
+        for file in SENSITIVE_FILES:
+            if file in backup_files:
                 logging.info(f"Including sensitive file in backup: {file}")
-                backup_files.add(file)
-        
-        # Create the zip archive
-        shutil.make_archive(
-            str(backup_path.with_suffix("")),  # Remove .zip extension
-            "zip",
-            root_dir=project_root,
-            base_dir="."
-        )
+        
+        # Create the zip archive, compressing shards of the file list in parallel
+        jobs = jobs or os.cpu_count() or 1
+        _write_zip_parallel(backup_path, project_root, backup_files, jobs)
         
         logging.info(f"Backup archive created: {backup_path}")
         return backup_path
         
-    except Exception as e:
+    except OSError as e:
+        # I/O failures (e.g. ENOSPC) are reported; anything else is a bug and propagates
+        logging.error(f"Error creating backup archive: {e}")
+        if backup_path.exists():
+            backup_path.unlink()  # Don't leave a truncated archive for cleanup to count
+        return None
+
+def scan_backup_files(project_root, include_venv=False, exclude_dirs=(), exclude_exts=()):
+    """
+    Find the files to back up with a single os.scandir pass
+    
+    Args:
+        project_root: Root directory of the project
+        include_venv: Whether to include the virtual environment
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
+        
+    Returns:
+        Dict mapping relative POSIX paths to their os.stat_result
+    """
+    skip_dirs = DEFAULT_EXCLUDE_DIRS | {STORE_DIRNAME} | set(exclude_dirs)
+    if include_venv:
+        skip_dirs -= VENV_DIRS
+    skip_exts = tuple(DEFAULT_EXCLUDE_EXTS | {ext if ext.startswith(".") else f".{ext}" for ext in exclude_exts})
+    
+    files = {}
+    skipped_suffixes = ARCHIVE_SUFFIXES + skip_exts
+    
+    def _walk(path, prefix):
+        try:
+            it = os.scandir(path)
+        except OSError:
+            return  # Unreadable directory, skipped like os.walk does
+        with it:
+            for entry in it:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if name not in skip_dirs:
+                        _walk(entry.path, f"{prefix}{name}/")
+                    continue
+                # One suffix test covers both skipped extensions and archive names
+                if name.endswith(skipped_suffixes):
+                    # Earlier backup archives would otherwise be stored again inside new ones
+                    if name.endswith(skip_exts) or name.startswith("trading_system_"):
+                        continue
+                if entry.is_symlink() and entry.is_dir():
+                    continue  # Symlinked directories are not followed
+                try:
+                    files[prefix + name] = entry.stat()
+                except OSError:
+                    continue  # Broken symlink or removed while walking
+    
+    # Sensitive files (.env etc.) sit in the project root, so the walk picks
+    # them up even though they are excluded from Git
+    _walk(os.fspath(project_root), "")
+    return files
+
+def list_backup_files(project_root, include_venv=False, exclude_dirs=(), exclude_exts=()):
+    """
+    List the files to back up, relative to the project root
+    
+    Args:
+        project_root: Root directory of the project
+        include_venv: Whether to include the virtual environment
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
+        
+    Returns:
+        Sorted list of relative POSIX paths
+    """
+    return sorted(scan_backup_files(project_root, include_venv, exclude_dirs, exclude_exts))
+
+_sha_checked = False
+
+def _check_sha_acceleration():
+    """Warn once if SHA-256 will run without the CPU's SHA extensions"""
+    global _sha_checked
+    if _sha_checked:
+        return
+    _sha_checked = True
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return  # Not Linux; nothing cheap to check
+    if " sha_ni" not in flags and " sha2" not in flags:
+        logging.warning("CPU has no SHA extensions; hashing changed files will be slower")
+
+def _sha256_file(path, size):
+    """
+    SHA-256 of a file
+    
+    Mid-sized files are mapped and handed to OpenSSL in one update() call
+    (it uses SHA-NI where the CPU has it); very large files are streamed
+    through one reused buffer so a single file can't balloon the RSS.
+    """
+    _check_sha_acceleration()
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        if size > MMAP_MAX:
+            buffer = bytearray(HASH_BLOCK)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hasher.update(view[:n])
+        elif size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+        else:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+def _blob_path(store_dir, sha):
+    """Location of a blob in the content-addressed store"""
+    return store_dir / "blobs" / sha[:2] / sha
+
+def _store_blob(src, blobs_dir):
+    """
+    Copy a file into the blob store under the SHA-256 of the copy
+    
+    The copy is hashed rather than the source, so a file that changes while
+    it is backed up can never leave a blob whose content does not match its
+    name (existing blobs are never rewritten).
+    
+    Returns:
+        Tuple of (sha256 hex digest, whether a new blob was written)
+    """
+    tmp = os.path.join(blobs_dir, f".incoming_{os.getpid()}.tmp")
+    try:
+        shutil.copyfile(src, tmp)
+        sha = _sha256_file(tmp, os.path.getsize(tmp))
+        blob = os.path.join(blobs_dir, sha[:2], sha)
+        if os.path.exists(blob):
+            return sha, False
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        os.replace(tmp, blob)
+        return sha, True
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+
+def create_incremental_backup(output_dir=None, include_venv=False, exclude_dirs=(), exclude_exts=()):
+    """
+    Create an incremental backup in a content-addressed store
+    
+    Only files whose size or modification time changed since the last run are
+    read and hashed; file contents are stored once per distinct SHA-256 under
+    backup_store/blobs, and each run writes a small manifest mapping paths to blobs.
+    
+    Args:
+        output_dir: Directory holding the backup store (default: project root)
+        include_venv: Whether to include the virtual environment in the backup
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
+        
+    Returns:
+        Path to the manifest of this backup
+    """
+    project_root = get_project_root()
+    output_dir = project_root if output_dir is None else Path(output_dir)
+    store_dir = output_dir / STORE_DIRNAME
+    (store_dir / "blobs").mkdir(parents=True, exist_ok=True)
+    
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    manifest_path = store_dir / f"manifest_{timestamp}.json"
+    state_path = store_dir / STATE_FILENAME
+    
+    logging.info(f"Creating incremental backup: {manifest_path}")
+    
+    try:
+        previous = {}
+        if state_path.exists():
+            with open(state_path) as f:
+                previous = json.load(f)
+        
+        entries = {}
+        hashed = 0
+        stored = 0
+        
+        # Plain string paths in the loop; Path joins cost more than the stat they precede
+        root = os.fspath(project_root)
+        blobs_dir = os.fspath(store_dir / "blobs")
+        join = os.path.join
+        exists = os.path.exists
+        
+        for rel_path, st in sorted(scan_backup_files(project_root, include_venv, exclude_dirs, exclude_exts).items()):
+            src = join(root, rel_path)
+            try:
+                entry = previous.get(rel_path)
+                if entry is None or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                             "sha256": _sha256_file(src, st.st_size)}
+                    hashed += 1
+                
+                sha = entry["sha256"]
+                if not exists(join(blobs_dir, sha[:2], sha)):  # Same layout as _blob_path
+                    stored_sha, new_blob = _store_blob(src, blobs_dir)
+                    if stored_sha != sha:
+                        # Changed since it was hashed; the manifest points at
+                        # what was actually stored, and the stale (mtime, size)
+                        # makes the next run hash it again
+                        logging.warning(f"{rel_path} changed while it was backed up")
+                        entry = {**entry, "sha256": stored_sha}
+                    stored += new_blob
+            except FileNotFoundError:
+                logging.warning(f"Skipping {rel_path}: removed during the backup")
+                continue
+            
+            entries[rel_path] = entry
+        
+        with open(manifest_path, 'w') as f:
+            json.dump({"created": timestamp, "files": entries}, f, indent=1, sort_keys=True)
+        with open(state_path, 'w') as f:
+            json.dump(entries, f)
+        
+        logging.info(f"Backed up {len(entries)} files ({hashed} re-hashed, {stored} new blobs)")
+        return manifest_path
+        
+    except (OSError, ValueError) as e:  # ValueError: unreadable JSON state file
+        logging.error(f"Error creating incremental backup: {e}")
+        return None
+
+def restore_incremental_backup(manifest_path, target_dir):
+    """
+    Restore the files listed in a backup manifest
+    
+    Args:
+        manifest_path: Path to a manifest_<timestamp>.json in the backup store
+        target_dir: Directory to restore the files into
+        
+    Returns:
+        True if every file was restored, False otherwise
+    """
+    manifest_path = Path(manifest_path)
+    store_dir = manifest_path.parent
+    target_dir = Path(target_dir)
+    
+    with open(manifest_path) as f:
+        files = json.load(f)["files"]
+    
+    missing = 0
+    for rel_path, entry in files.items():
+        blob = _blob_path(store_dir, entry["sha256"])
+        if not blob.exists():
+            logging.error(f"Missing blob for {rel_path}: {entry['sha256']}")
+            missing += 1
+            continue
+        dst = target_dir / rel_path
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(blob, dst)
+    
+    logging.info(f"Restored {len(files) - missing} of {len(files)} files to {target_dir}")
+    return missing == 0
+
+def _read_ahead(project_root, files, depth=READ_AHEAD_DEPTH):
+    """
+    Yield (rel_path, chunks) for each file while a thread reads ahead
+    
+    The reader thread keeps up to `depth` READ_CHUNK-sized reads queued, so
+    disk reads overlap with compression instead of alternating with it.
+    Each `chunks` iterator must be consumed before the next file is taken.
+    """
+    pending = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    
+    # Queue protocol: a path starts a file, bytes follow, b"" ends the file,
+    # None ends the stream and an exception is re-raised in the consumer
+    def _reader():
+        try:
+            for rel_path in files:
+                with open(Path(project_root) / rel_path, 'rb') as f:
+                    pending.put(rel_path)
+                    while not stop.is_set():
+                        chunk = f.read(READ_CHUNK)
+                        pending.put(chunk)
+                        if not chunk:
+                            break
+                if stop.is_set():
+                    return
+            pending.put(None)
+        except Exception as e:
+            pending.put(e)
+    
+    def _next():
+        item = pending.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+    
+    def _chunks():
+        while True:
+            chunk = _next()
+            if not chunk:
+                return
+            yield chunk
+    
+    reader = threading.Thread(target=_reader, daemon=True)
+    reader.start()
+    try:
+        while True:
+            rel_path = _next()
+            if rel_path is None:
+                return
+            yield rel_path, _chunks()
+    finally:
+        # Unblock the reader if the consumer stopped early
+        stop.set()
+        while reader.is_alive():
+            try:
+                pending.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def _train_znpy_dictionary(project_root, files):
+    """
+    Train a zstd dictionary on a sample of the small files, or return None
+    
+    Most of a source tree is small files of a few kinds, which zstd
+    compresses poorly one frame at a time; a shared dictionary primes each
+    frame with the common content.
+    """
+    small = [rel_path for rel_path in sorted(files) if 0 < files[rel_path].st_size <= ZSTD_DICT_MAX_SAMPLE]
+    total = sum(files[rel_path].st_size for rel_path in small)
+    if len(small) < ZSTD_DICT_MIN_FILES or total < ZSTD_DICT_MIN_SAMPLE_BYTES:
+        return None
+    
+    # Spread the sample evenly over the (sorted) tree rather than taking one directory
+    step = max(1, round(total / ZSTD_DICT_SAMPLE_BYTES))
+    samples = []
+    for rel_path in small[::step]:
+        try:
+            with open(os.path.join(project_root, rel_path), 'rb') as f:
+                samples.append(f.read())
+        except OSError:
+            continue
+    
+    try:
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples)
+    except zstandard.ZstdError as e:
+        logging.warning(f"Could not train a zstd dictionary, compressing without one: {e}")
+        return None
+
+def _write_znpy(out, project_root, files, level=ZSTD_LEVEL):
+    """
+    Write a .znpy archive of the files ({rel_path: stat}) to `out`
+    
+    The archive is produced strictly front to back, so `out` only needs
+    write() and tell(); it does not have to be seekable.
+    
+    Returns:
+        Number of files written
+    """
+    out.write(ZNPY_MAGIC)
+    
+    dictionary = _train_znpy_dictionary(project_root, files)
+    dict_info = None
+    if dictionary is not None:
+        dict_bytes = dictionary.as_bytes()
+        dict_info = {"offset": out.tell(), "length": len(dict_bytes)}
+        out.write(dict_bytes)
+    
+    cctx = zstandard.ZstdCompressor(level=level, threads=-1, dict_data=dictionary)
+    index = []
+    for rel_path, chunks in _read_ahead(project_root, sorted(files)):
+        hasher = hashlib.sha256()
+        offset = out.tell()
+        ulen = 0
+        writer = cctx.stream_writer(out, closefd=False)
+        for chunk in chunks:
+            hasher.update(chunk)
+            writer.write(chunk)
+            ulen += len(chunk)
+        writer.flush(zstandard.FLUSH_FRAME)
+        index.append({
+            "path": rel_path,
+            "offset": offset,
+            "clen": out.tell() - offset,
+            "ulen": ulen,
+            "sha256": hasher.hexdigest()
+        })
+    
+    index_offset = out.tell()
+    out.write(json.dumps({"dict": dict_info, "files": index}).encode())
+    out.write(ZNPY_TRAILER.pack(index_offset, ZNPY_MAGIC))
+    return len(index)
+
+def create_backup_archive_zstd(output_dir=None, include_venv=False, level=ZSTD_LEVEL, exclude_dirs=(), exclude_exts=()):
+    """
+    Create a full backup as a zstd-compressed .znpy archive
+    
+    Each file is written as its own zstd frame (sharing a dictionary trained
+    on the tree's small files, when there are enough), followed by a JSON index of
+    {path, offset, clen, ulen, sha256} entries, so single files can be
+    extracted without reading the rest of the archive. libzstd compresses
+    with its own worker threads.
+    
+    Args:
+        output_dir: Directory to save the backup archive (default: project root)
+        include_venv: Whether to include the virtual environment in the backup
+        level: zstd compression level
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
+        
+    Returns:
+        Path to the created backup archive
+    """
+    if not ZSTD_AVAILABLE:
+        logging.error("zstandard not installed. Install with: pip install zstandard")
+        return None
+    
+    project_root = get_project_root()
+    output_dir = Path(output_dir) if output_dir else project_root
+    output_dir.mkdir(exist_ok=True)
+    
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_path = output_dir / f"trading_system_backup_{timestamp}.znpy"
+    tmp_path = backup_path.with_name(f".{backup_path.name}.tmp")
+    
+    logging.info(f"Creating backup archive: {backup_path}")
+    
+    try:
+        files = scan_backup_files(project_root, include_venv, exclude_dirs, exclude_exts)
+        with open(tmp_path, 'wb') as out:
+            count = _write_znpy(out, project_root, files, level)
+        os.replace(tmp_path, backup_path)
+        
+        logging.info(f"Backup archive created: {backup_path} ({count} files)")
+        return backup_path
+        
+    except (OSError, zstandard.ZstdError) as e:
+        logging.error(f"Error creating backup archive: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        return None
+
+def _write_tar_zst(out, project_root, files, level=ZSTD_LEVEL):
+    """
+    Write a zstd-compressed tar of the files ({rel_path: stat}) to `out`
+    
+    Like _write_znpy, `out` only needs write(); the tar is streamed into a
+    zstd compressor running on its own worker threads.
+    
+    Returns:
+        Number of files written
+    """
+    root = os.fspath(project_root)
+    cctx = zstandard.ZstdCompressor(level=level, threads=-1)
+    with cctx.stream_writer(out, closefd=False) as zout, \
+            tarfile.open(fileobj=zout, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+        # One solid stream, so group similar files: by extension, then
+        # directory, then name, keeping related content within zstd's window
+        order = sorted(files, key=lambda p: (os.path.splitext(p)[1], os.path.dirname(p), os.path.basename(p)))
+        for rel_path in order:
+            st = files[rel_path]
+            # Reuse the scan's stat instead of letting tarfile stat again
+            info = tarfile.TarInfo(rel_path)
+            info.size = st.st_size
+            info.mtime = st.st_mtime
+            info.mode = st.st_mode & 0o7777
+            with open(os.path.join(root, rel_path), 'rb') as f:
+                tar.addfile(info, f)
+    return len(files)
+
+def create_backup_archive_tar_zst(output_dir=None, include_venv=False, level=ZSTD_LEVEL, exclude_dirs=(), exclude_exts=()):
+    """
+    Create a full backup as a zstd-compressed tar stream
+    
+    Unlike .znpy, the archive has no index to seek through, but it can be
+    restored with standard tools (`tar --zstd -xf ARCHIVE`). The tar stream is
+    written straight into a multi-threaded zstd compressor.
+    
+    Args:
+        output_dir: Directory to save the backup archive (default: project root)
+        include_venv: Whether to include the virtual environment in the backup
+        level: zstd compression level
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
+        
+    Returns:
+        Path to the created backup archive
+    """
+    if not ZSTD_AVAILABLE:
+        logging.error("zstandard not installed. Install with: pip install zstandard")
+        return None
+    
+    project_root = get_project_root()
+    output_dir = Path(output_dir) if output_dir else project_root
+    output_dir.mkdir(exist_ok=True)
+    
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_path = output_dir / f"trading_system_backup_{timestamp}.tar.zst"
+    tmp_path = backup_path.with_name(f".{backup_path.name}.tmp")
+    
+    logging.info(f"Creating backup archive: {backup_path}")
+    
+    try:
+        files = scan_backup_files(project_root, include_venv, exclude_dirs, exclude_exts)
+        with open(tmp_path, 'wb') as out:
+            count = _write_tar_zst(out, project_root, files, level)
+        os.replace(tmp_path, backup_path)
+        
+        logging.info(f"Backup archive created: {backup_path} ({count} files)")
+        return backup_path
+        
+    except (OSError, tarfile.TarError, zstandard.ZstdError) as e:
         logging.error(f"Error creating backup archive: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
         return None
 
+def read_znpy_index(archive_path):
+    """Return the index of a .znpy archive as {"dict": info or None, "files": entries}"""
+    with open(archive_path, 'rb') as f:
+        header = f.read(len(ZNPY_MAGIC))
+        if header not in (ZNPY_MAGIC, ZNPY_MAGIC_V1):
+            raise ValueError(f"Not a .znpy archive: {archive_path}")
+        f.seek(-ZNPY_TRAILER.size, os.SEEK_END)
+        trailer_offset = f.tell()
+        index_offset, magic = ZNPY_TRAILER.unpack(f.read(ZNPY_TRAILER.size))
+        if magic != header:
+            raise ValueError(f"Truncated .znpy archive: {archive_path}")
+        f.seek(index_offset)
+        index = json.loads(f.read(trailer_offset - index_offset))
+    if header == ZNPY_MAGIC_V1:
+        index = {"dict": None, "files": index}
+    return index
+
+def extract_znpy_archive(archive_path, target_dir, paths=None):
+    """
+    Extract files from a .znpy archive
+    
+    Args:
+        archive_path: Path to the .znpy archive
+        target_dir: Directory to extract into
+        paths: Relative paths to extract (default: all files)
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if not ZSTD_AVAILABLE:
+        logging.error("zstandard not installed. Install with: pip install zstandard")
+        return False
+    
+    try:
+        archive_index = read_znpy_index(archive_path)
+        index = archive_index["files"]
+        if paths is not None:
+            wanted = set(paths)
+            index = [entry for entry in index if entry["path"] in wanted]
+            missing = wanted - {entry["path"] for entry in index}
+            if missing:
+                logging.warning(f"Not in archive: {', '.join(sorted(missing))}")
+        
+        target_dir = Path(target_dir)
+        with open(archive_path, 'rb') as f:
+            dictionary = None
+            dict_info = archive_index["dict"]
+            if dict_info:
+                f.seek(dict_info["offset"])
+                dictionary = zstandard.ZstdCompressionDict(f.read(dict_info["length"]))
+            dctx = zstandard.ZstdDecompressor(dict_data=dictionary)
+            
+            for entry in index:
+                dest = target_dir / entry["path"]
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                hasher = hashlib.sha256()
+                
+                # Seek straight to the file's frame and decompress only that
+                f.seek(entry["offset"])
+                remaining = entry["clen"]
+                decompressor = dctx.decompressobj()
+                with open(dest, 'wb') as out:
+                    while remaining:
+                        size = min(remaining, READ_CHUNK)
+                        chunk = decompressor.decompress(f.read(size))
+                        remaining -= size
+                        hasher.update(chunk)
+                        out.write(chunk)
+                
+                if hasher.hexdigest() != entry["sha256"]:
+                    logging.error(f"Checksum mismatch for {entry['path']}")
+                    return False
+        
+        logging.info(f"Extracted {len(index)} files to {target_dir}")
+        return True
+        
+    except (OSError, ValueError, zstandard.ZstdError) as e:  # ValueError: not a .znpy archive or bad index
+        logging.error(f"Error extracting archive: {e}")
+        return False
+
 def create_test_backup(output_dir=None):
     """
     Create a smaller test backup with only essential files
@@ -168,56 +996,110 @@ def create_test_backup(output_dir=None):
     
     logging.info(f"Creating test backup archive: {backup_path}")
     
-    # Create a temporary directory for the test backup
-    temp_dir = Path(output_dir) / f"temp_backup_{timestamp}"
-    temp_dir.mkdir(exist_ok=True)
-    
     try:
-        # Copy only essential files to the temp directory
-        essential_files = [
-            ".env",
-            ".gitignore",
-            "README.md",
-            "DEVELOPMENT_NOTES.md",
-            "tools/backup/aws_config.py",
-            "tools/backup/backup_to_s3.py",
-            "tools/backup/schedule_s3_backup.py",
-            "tools/backup/README_AWS.md"
-        ]
-        
-        for file_path in essential_files:
-            src_path = project_root / file_path
-            if src_path.exists():
-                # Create parent directories if needed
-                dst_path = temp_dir / file_path
-                dst_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Copy the file
-                shutil.copy2(src_path, dst_path)
-                logging.info(f"Added to test backup: {file_path}")
-        
-        # Create the zip archive
-        shutil.make_archive(
-            str(backup_path.with_suffix("")),  # Remove .zip extension
-            "zip",
-            root_dir=temp_dir,
-            base_dir="."
-        )
+        # Write only the essential files, straight from the project into the zip
+        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL) as zf:
+            for file_path in ESSENTIAL_FILES:
+                src_path = project_root / file_path
+                if src_path.is_file():
+                    zf.write(src_path, arcname=file_path)
+                    logging.info(f"Added to test backup: {file_path}")
         
         logging.info(f"Test backup archive created: {backup_path}")
-        
-        # Clean up the temp directory
-        shutil.rmtree(temp_dir)
-        
         return backup_path
         
-    except Exception as e:
+    except OSError as e:
         logging.error(f"Error creating test backup archive: {e}")
-        # Clean up the temp directory if it exists
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
+        if backup_path.exists():
+            backup_path.unlink()
         return None
 
+# S3 clients by (pid, region, access key, secret key), so repeated uploads in one
+# process skip loading the service model and resolving credentials again
+_S3_CLIENTS = {}
+
+# Enough pooled connections for UPLOAD_CONCURRENCY blobs x TRANSFER_CONFIG parts
+# (botocore's default of 10 makes parallel uploads queue for a connection),
+# with adaptive retries so throttling backs off instead of failing the backup
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 10, 'mode': 'adaptive'}
+) if AWS_AVAILABLE else None
+
+def _create_s3_client(aws_region=None, aws_access_key=None, aws_secret_key=None):
+    """Return an S3 client from explicit credentials or the default AWS config, reusing one per process"""
+    cache_key = (os.getpid(), aws_region, aws_access_key, aws_secret_key)
+    client = _S3_CLIENTS.get(cache_key)
+    if client is not None:
+        return client
+    
+    if aws_access_key and aws_secret_key:
+        logging.info("Using provided AWS credentials")
+        client = boto3.client(
+            's3',
+            region_name=aws_region,
+            aws_access_key_id=aws_access_key,
+            aws_secret_access_key=aws_secret_key,
+            config=S3_CLIENT_CONFIG
+        )
+    else:
+        # Use credentials from ~/.aws/credentials or environment variables
+        logging.info("Using AWS credentials from config or environment")
+        client = boto3.client('s3', region_name=aws_region, config=S3_CLIENT_CONFIG)
+    
+    _S3_CLIENTS[cache_key] = client
+    return client
+
+class _UploadProgress:
+    """upload_file callback that logs progress every 10 seconds and on completion"""
+    
+    def __init__(self, filename, size):
+        self._filename = filename
+        self._size = size  # Kept as an int so the completion check stays exact
+        self._seen_so_far = 0
+        self._lock = threading.Lock()  # Attribute += is not atomic across threads
+        self._last_log_time = time.monotonic()
+    
+    def __call__(self, bytes_amount):
+        # Hold the lock only for the counter; logging does I/O under its own lock
+        with self._lock:
+            self._seen_so_far += bytes_amount
+            seen = self._seen_so_far
+        
+        # Log progress every 10 seconds or when complete; a racing thread may
+        # occasionally log twice, which is harmless
+        current_time = time.monotonic()
+        if current_time - self._last_log_time > 10 or seen == self._size:
+            self._last_log_time = current_time
+            logging.info(f"Upload progress: {seen * 100 / self._size:.2f}%")
+
+def _upload_file(s3_client, file_path, bucket_name, s3_key, progress=False, size=None,
+                 extra_args=S3_UPLOAD_ARGS):
+    """
+    Upload one file, as a single PutObject if it is small
+    
+    upload_file sets up a transfer manager and thread pool on every call;
+    for files below SMALL_UPLOAD_THRESHOLD it ends up sending one PutObject
+    anyway, so send it directly. Larger files go through TRANSFER_CONFIG's
+    parallel multipart upload, logging progress if asked to. Pass `size`
+    when the caller has already stat'ed the file. `extra_args` (encryption,
+    storage class) apply to either kind of upload.
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
+    if size < SMALL_UPLOAD_THRESHOLD:
+        with open(file_path, 'rb') as f:
+            s3_client.put_object(Bucket=bucket_name, Key=s3_key, Body=f, **extra_args)
+    else:
+        s3_client.upload_file(
+            str(file_path),
+            bucket_name,
+            s3_key,
+            ExtraArgs=extra_args,
+            Config=TRANSFER_CONFIG,
+            Callback=_UploadProgress(str(file_path), size) if progress else None
+        )
+
 def upload_to_s3(file_path, bucket_name, aws_region=None, aws_access_key=None, aws_secret_key=None):
     """
     Upload a file to AWS S3
@@ -239,79 +1121,24 @@ def upload_to_s3(file_path, bucket_name, aws_region=None, aws_access_key=None, a
     try:
         logging.info(f"Uploading to AWS S3 bucket: {bucket_name}")
         
-        # Create an S3 client
-        if aws_access_key and aws_secret_key:
-            logging.info("Using provided AWS credentials")
-            s3_client = boto3.client(
-                's3',
-                region_name=aws_region,
-                aws_access_key_id=aws_access_key,
-                aws_secret_access_key=aws_secret_key
-            )
-        else:
-            # Use credentials from ~/.aws/credentials or environment variables
-            logging.info("Using AWS credentials from config or environment")
-            s3_client = boto3.client('s3', region_name=aws_region)
+        s3_client = _create_s3_client(aws_region, aws_access_key, aws_secret_key)
         
         # Get the file name from the path
         file_name = os.path.basename(file_path)
         file_size = os.path.getsize(file_path)
         logging.info(f"File size: {file_size / (1024 * 1024):.2f} MB")
         
-        # For large files, use multipart upload with progress callback
-        if file_size > 100 * 1024 * 1024:  # If file is larger than 100 MB
-            logging.info("Using multipart upload for large file")
-            
-            # Define a progress callback
-            class ProgressPercentage:
-                def __init__(self, filename):
-                    self._filename = filename
-                    self._size = float(os.path.getsize(filename))
-                    self._seen_so_far = 0
-                    self._lock = threading.Lock()
-                    self._last_log_time = time.time()
-                
-                def __call__(self, bytes_amount):
-                    with self._lock:
-                        self._seen_so_far += bytes_amount
-                        percentage = (self._seen_so_far / self._size) * 100
-                        
-                        # Log progress every 10 seconds or when complete
-                        current_time = time.time()
-                        if current_time - self._last_log_time > 10 or self._seen_so_far == self._size:
-                            logging.info(f"Upload progress: {percentage:.2f}%")
-                            self._last_log_time = current_time
-            
-            # Upload the file with progress tracking
-            s3_key = f"trading_system_backups/{file_name}"
-            logging.info(f"Starting upload to S3 key: {s3_key}")
-            
-            try:
-                s3_client.upload_file(
-                    str(file_path),
-                    bucket_name,
-                    s3_key,
-                    Callback=ProgressPercentage(str(file_path))
-                )
-                logging.info(f"Successfully uploaded to S3: {file_name}")
-            except Exception as e:
-                logging.error(f"Error during multipart upload: {e}")
-                return False
-        else:
-            # For smaller files, use simple upload
-            logging.info(f"Uploading {file_name} to S3...")
-            s3_key = f"trading_system_backups/{file_name}"
-            
-            try:
-                s3_client.upload_file(
-                    str(file_path),
-                    bucket_name,
-                    s3_key
-                )
-                logging.info(f"Successfully uploaded to S3: {file_name}")
-            except Exception as e:
-                logging.error(f"Error during upload: {e}")
-                return False
+        # Small files go up in one request, larger ones as a parallel multipart upload
+        s3_key = f"trading_system_backups/{file_name}"
+        logging.info(f"Starting upload to S3 key: {s3_key}")
+        
+        try:
+            _upload_file(s3_client, file_path, bucket_name, s3_key, progress=True, size=file_size,
+                         extra_args=S3_ARCHIVE_ARGS)
+            logging.info(f"Successfully uploaded to S3: {file_name}")
+        except Exception as e:
+            logging.error(f"Error during upload: {e}")
+            return False
         
         # Get the URL of the uploaded file
         if aws_region:
@@ -330,6 +1157,275 @@ def upload_to_s3(file_path, bucket_name, aws_region=None, aws_access_key=None, a
         logging.exception("Stack trace:")
         return False
 
+class S3MultipartWriter:
+    """
+    Write-only file object that uploads what is written as an S3 multipart upload
+    
+    Data is buffered into S3_PART_SIZE parts, which a background thread
+    uploads while the caller keeps compressing; at most S3_PART_QUEUE parts
+    wait in between. close() sends the last part and completes the upload,
+    abort() discards everything uploaded so far. An upload error is raised
+    from the next write() or close().
+    """
+    
+    def __init__(self, s3_client, bucket_name, s3_key, extra_args=S3_ARCHIVE_ARGS):
+        self._client = s3_client
+        self._bucket = bucket_name
+        self._key = s3_key
+        self._buffer = bytearray()
+        self._parts = []
+        self._position = 0
+        self._error = None
+        self._upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=s3_key, **extra_args)['UploadId']
+        self._queue = queue.Queue(maxsize=S3_PART_QUEUE)
+        self._uploader = threading.Thread(target=self._upload_parts, daemon=True)
+        self._uploader.start()
+    
+    def write(self, data):
+        if self._error:
+            raise self._error
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= S3_PART_SIZE:
+            self._queue.put(bytes(self._buffer[:S3_PART_SIZE]))
+            del self._buffer[:S3_PART_SIZE]
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def _upload_parts(self):
+        """Uploader thread: send queued parts in order until the None sentinel"""
+        while True:
+            body = self._queue.get()
+            if body is None:
+                return
+            if self._error:
+                continue  # Keep draining so the writer never blocks on a full queue
+            try:
+                part_number = len(self._parts) + 1
+                response = self._client.upload_part(
+                    Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                    PartNumber=part_number, Body=body
+                )
+                self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+            except Exception as e:
+                self._error = e
+    
+    def _finish_uploads(self):
+        """Stop the uploader thread once every queued part has been handled"""
+        if self._uploader.is_alive():
+            self._queue.put(None)
+            self._uploader.join()
+    
+    def close(self):
+        """Upload the remaining bytes and complete the upload"""
+        if self._buffer or not self._position:
+            self._queue.put(bytes(self._buffer))
+            self._buffer.clear()
+        self._finish_uploads()
+        if self._error:
+            raise self._error
+        self._client.complete_multipart_upload(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+            MultipartUpload={'Parts': self._parts}
+        )
+    
+    def abort(self):
+        self._finish_uploads()
+        self._client.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+
+class TeeWriter:
+    """Write-only file object that copies everything written to several streams"""
+    
+    def __init__(self, *streams):
+        self._streams = streams
+        self._position = 0
+    
+    def write(self, data):
+        for stream in self._streams:
+            stream.write(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def flush(self):
+        for stream in self._streams:
+            stream.flush()
+
+def stream_backup_to_s3(bucket_name, include_venv=False, output_dir=None, keep_local=False,
+                        aws_region=None, aws_access_key=None, aws_secret_key=None,
+                        exclude_dirs=(), exclude_exts=(), archive_format='znpy'):
+    """
+    Compress a full .znpy or .tar.zst backup straight into an S3 multipart upload
+    
+    Nothing is written to local disk unless keep_local is set, in which case
+    the same bytes are also saved to the output directory.
+    
+    Args:
+        bucket_name: Name of the S3 bucket to upload to
+        include_venv: Whether to include the virtual environment in the backup
+        output_dir: Directory for the local copy (default: project root)
+        keep_local: Also keep a local copy of the archive
+        aws_region: AWS region (optional, uses default from AWS config if not specified)
+        aws_access_key: AWS access key (optional)
+        aws_secret_key: AWS secret access key
+        exclude_dirs: Directory names to skip in addition to DEFAULT_EXCLUDE_DIRS
+        exclude_exts: File extensions to skip in addition to DEFAULT_EXCLUDE_EXTS
+        archive_format: 'znpy' or 'tar.zst'
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if not AWS_AVAILABLE:
+        logging.error("AWS SDK (boto3) not available. Skipping upload.")
+        return False
+    if not ZSTD_AVAILABLE:
+        logging.error("zstandard not installed. Install with: pip install zstandard")
+        return False
+    
+    write_archive = _write_tar_zst if archive_format == 'tar.zst' else _write_znpy
+    project_root = get_project_root()
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"trading_system_backup_{timestamp}.{archive_format}"
+    s3_key = f"{S3_PREFIX}/{file_name}"
+    
+    local_path = None
+    if keep_local:
+        output_dir = Path(output_dir) if output_dir else project_root
+        output_dir.mkdir(exist_ok=True)
+        local_path = output_dir / file_name
+    
+    writer = None
+    local_file = None
+    try:
+        files = scan_backup_files(project_root, include_venv, exclude_dirs, exclude_exts)
+        s3_client = _create_s3_client(aws_region, aws_access_key, aws_secret_key)
+        logging.info(f"Streaming backup to S3 key: {s3_key}")
+        
+        writer = S3MultipartWriter(s3_client, bucket_name, s3_key)
+        out = writer
+        if local_path:
+            local_file = open(local_path.with_name(f".{file_name}.tmp"), 'wb')
+            out = TeeWriter(writer, local_file)
+        
+        count = write_archive(out, project_root, files)
+        writer.close()
+        if local_file:
+            local_file.close()
+            os.replace(local_file.name, local_path)
+            logging.info(f"Local copy saved at: {local_path}")
+        
+        logging.info(f"Successfully streamed {count} files ({writer.tell() / (1024 * 1024):.2f} MB) to S3: {file_name}")
+        return True
+        
+    except Exception as e:
+        logging.error(f"Error streaming backup to S3: {e}")
+        if writer:
+            try:
+                writer.abort()
+            except Exception as abort_error:
+                logging.warning(f"Could not abort multipart upload: {abort_error}")
+        if local_file:
+            local_file.close()
+            os.remove(local_file.name)
+        return False
+
+def upload_many_to_s3(s3_client, bucket_name, uploads, concurrency=UPLOAD_CONCURRENCY):
+    """
+    Upload many files to S3 in parallel over one shared client
+    
+    Args:
+        s3_client: boto3 S3 client (clients are thread-safe)
+        bucket_name: Name of the S3 bucket to upload to
+        uploads: List of (local_path, s3_key) pairs
+        concurrency: Number of uploads in flight at once
+        
+    Returns:
+        Number of files uploaded; the first failed upload raises
+    """
+    if concurrency <= 1 or len(uploads) < 2:
+        for local_path, s3_key in uploads:
+            _upload_file(s3_client, local_path, bucket_name, s3_key)
+        return len(uploads)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(_upload_file, s3_client, local_path, bucket_name, s3_key)
+                   for local_path, s3_key in uploads]
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            for future in futures:
+                future.cancel()  # Don't start the rest once one upload has failed
+            raise
+    return len(uploads)
+
+def upload_incremental_to_s3(manifest_path, bucket_name, aws_region=None, aws_access_key=None, aws_secret_key=None,
+                             concurrency=UPLOAD_CONCURRENCY):
+    """
+    Upload an incremental backup to AWS S3
+    
+    Only blobs that are not in the bucket yet are uploaded; the manifest goes
+    last so a manifest in S3 never references a missing blob.
+    
+    Args:
+        manifest_path: Path to the manifest created by create_incremental_backup
+        bucket_name: Name of the S3 bucket to upload to
+        aws_region: AWS region (optional, uses default from AWS config if not specified)
+        aws_access_key: AWS access key (optional)
+        aws_secret_key: AWS secret access key
+        concurrency: Number of blob uploads in flight at once
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    if not AWS_AVAILABLE:
+        logging.error("AWS SDK (boto3) not available. Skipping upload.")
+        return False
+    
+    manifest_path = Path(manifest_path)
+    store_dir = manifest_path.parent
+    blob_prefix = f"{S3_PREFIX}/blobs/"
+    
+    try:
+        logging.info(f"Uploading incremental backup to AWS S3 bucket: {bucket_name}")
+        s3_client = _create_s3_client(aws_region, aws_access_key, aws_secret_key)
+        
+        # One paginated listing instead of a HEAD request per blob
+        remote = set()
+        for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=blob_prefix):
+            remote.update(obj['Key'] for obj in page.get('Contents', []))
+        
+        with open(manifest_path) as f:
+            shas = {entry["sha256"] for entry in json.load(f)["files"].values()}
+        
+        missing = sorted(sha for sha in shas if f"{blob_prefix}{sha[:2]}/{sha}" not in remote)
+        logging.info(f"{len(missing)} of {len(shas)} blobs need uploading")
+        upload_many_to_s3(
+            s3_client, bucket_name,
+            [(_blob_path(store_dir, sha), f"{blob_prefix}{sha[:2]}/{sha}") for sha in missing],
+            concurrency
+        )
+        
+        s3_key = f"{S3_PREFIX}/manifests/{manifest_path.name}"
+        _upload_file(s3_client, manifest_path, bucket_name, s3_key)
+        logging.info(f"Successfully uploaded to S3: {s3_key}")
+        return True
+        
+    except ClientError as e:
+        logging.error(f"AWS Error uploading to S3: {e}")
+        return False
+    except Exception as e:
+        logging.error(f"Unexpected error during S3 upload: {e}")
+        logging.exception("Stack trace:")
+        return False
+
 def cleanup_old_backups(backup_dir, max_backups=5):
     """
     Remove old backup archives to save space
@@ -339,58 +1435,129 @@ def cleanup_old_backups(backup_dir, max_backups=5):
         max_backups: Maximum number of backups to keep
     """
     backup_dir = Path(backup_dir)
-    backups = list(backup_dir.glob("trading_system_backup_*.zip"))
+    
+    # One directory pass; DirEntry caches the stat used for sorting
+    backups = []
+    with contextlib.suppress(FileNotFoundError), os.scandir(backup_dir) as it:
+        backups = [entry for entry in it
+                   if entry.name.startswith("trading_system_backup_")
+                   and entry.name.endswith(ARCHIVE_SUFFIXES) and entry.is_file()]
     
     # Sort backups by modification time (oldest first)
-    backups.sort(key=lambda x: x.stat().st_mtime)
+    backups.sort(key=lambda entry: entry.stat().st_mtime)
     
     # Remove oldest backups if we have more than max_backups
     if len(backups) > max_backups:
         for backup in backups[:-max_backups]:
-            logging.info(f"Removing old backup: {backup}")
-            backup.unlink()
+            logging.info(f"Removing old backup: {backup.path}")
+            os.unlink(backup.path)
+    
+    # Incremental backups: prune manifests the same way, then drop unreferenced blobs
+    store_dir = backup_dir / STORE_DIRNAME
+    manifests = sorted(store_dir.glob("manifest_*.json"))  # Timestamped names sort oldest first
+    if len(manifests) > max_backups:
+        for manifest in manifests[:-max_backups]:
+            logging.info(f"Removing old manifest: {manifest}")
+            manifest.unlink()
+        
+        referenced = set()
+        for manifest in manifests[-max_backups:]:
+            with open(manifest) as f:
+                referenced.update(entry["sha256"] for entry in json.load(f)["files"].values())
+        
+        removed = 0
+        for blob in (store_dir / "blobs").glob("*/*"):
+            if blob.name not in referenced:
+                blob.unlink()
+                removed += 1
+        logging.info(f"Removed {removed} unreferenced blobs")
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Backup trading system to AWS S3')
     parser.add_argument('--output-dir', help='Directory to save the backup archive')
     parser.add_argument('--include-venv', action='store_true', help='Include virtual environment in backup')
     parser.add_argument('--max-backups', type=int, default=MAX_BACKUPS, help='Maximum number of backups to keep')
+    parser.add_argument('--exclude', action='append', metavar='DIR', help='Skip directories with this name (repeatable; adds to the defaults)')
+    parser.add_argument('--exclude-ext', action='append', metavar='EXT', help='Skip files with this extension (repeatable; adds to .pyc/.pyo)')
     parser.add_argument('--no-upload', action='store_true', help='Skip uploading to S3')
     parser.add_argument('--bucket', help='S3 bucket name')
     parser.add_argument('--region', help='AWS region (e.g., us-east-1)')
     parser.add_argument('--access-key', help='AWS access key ID')
     parser.add_argument('--secret-key', help='AWS secret access key')
     parser.add_argument('--test', action='store_true', help='Create a smaller test backup with only essential files')
+    parser.add_argument('--full', action='store_true', help='Create a full archive instead of an incremental backup')
+    parser.add_argument('--format', choices=['znpy', 'zip', 'tar.zst'], default=None, help='Full archive format (default: znpy if zstandard is installed, else zip)')
+    parser.add_argument('--keep-local', action='store_true', help='When streaming a .znpy or .tar.zst archive to S3, also keep a local copy')
+    parser.add_argument('--concurrency', type=int, default=UPLOAD_CONCURRENCY, help=f'Parallel blob uploads for incremental backups (default: {UPLOAD_CONCURRENCY})')
+    parser.add_argument('--jobs', type=int, default=None, help='Processes compressing a full archive in parallel (default: CPU count)')
+    parser.add_argument('--restore', metavar='MANIFEST', help='Restore the files of an incremental backup manifest')
+    parser.add_argument('--extract', metavar='ARCHIVE', help='Extract a .znpy archive into --restore-dir')
+    parser.add_argument('--only', action='append', metavar='PATH', help='With --extract, only extract this file (repeatable)')
+    parser.add_argument('--restore-dir', default='restored', help='Directory to restore into (default: restored)')
+    
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    if args.restore:
+        sys.exit(0 if restore_incremental_backup(args.restore, args.restore_dir) else 1)
+    if args.extract:
+        sys.exit(0 if extract_znpy_archive(args.extract, args.restore_dir, args.only) else 1)
     
     # Use command line arguments if provided, otherwise use config values
     bucket_name = args.bucket or S3_BUCKET_NAME
     aws_region = args.region or AWS_REGION
     include_venv = args.include_venv or INCLUDE_VENV
+    excludes = {'exclude_dirs': args.exclude or (), 'exclude_exts': args.exclude_ext or ()}
     max_backups = args.max_backups
     aws_access_key = args.access_key or AWS_ACCESS_KEY_ID
     aws_secret_key = args.secret_key or AWS_SECRET_ACCESS_KEY
     
     # Create the backup archive
+    incremental = not (args.test or args.full)
     if args.test:
         logging.info("Creating test backup (smaller size)")
         backup_path = create_test_backup(args.output_dir)
+    elif args.full:
+        archive_format = args.format or ('znpy' if ZSTD_AVAILABLE else 'zip')
+        logging.info(f"Creating full backup ({archive_format})")
+        if archive_format in ('znpy', 'tar.zst') and bucket_name and not args.no_upload and AWS_AVAILABLE:
+            # Compress straight into the upload instead of staging the archive on disk
+            ok = stream_backup_to_s3(bucket_name, include_venv, args.output_dir, args.keep_local,
+                                     aws_region, aws_access_key, aws_secret_key, **excludes,
+                                     archive_format=archive_format)
+            if ok and args.keep_local:
+                cleanup_old_backups(Path(args.output_dir) if args.output_dir else get_project_root(), max_backups)
+            sys.exit(0 if ok else 1)
+        elif archive_format == 'znpy':
+            backup_path = create_backup_archive_zstd(args.output_dir, include_venv, **excludes)
+        elif archive_format == 'tar.zst':
+            backup_path = create_backup_archive_tar_zst(args.output_dir, include_venv, **excludes)
+        else:
+            backup_path = create_backup_archive(args.output_dir, include_venv, args.jobs, **excludes)
     else:
-        logging.info("Creating full backup")
-        backup_path = create_backup_archive(args.output_dir, include_venv)
+        logging.info("Creating incremental backup")
+        backup_path = create_incremental_backup(args.output_dir, include_venv, **excludes)
     
     if backup_path:
         # Upload to S3
         if not args.no_upload and AWS_AVAILABLE:
             if bucket_name:
-                upload_to_s3(
-                    backup_path, 
-                    bucket_name, 
-                    aws_region,
-                    aws_access_key,
-                    aws_secret_key
-                )
+                if incremental:
+                    upload_incremental_to_s3(
+                        backup_path,
+                        bucket_name,
+                        aws_region,
+                        aws_access_key,
+                        aws_secret_key,
+                        args.concurrency
+                    )
+                else:
+                    upload_to_s3(
+                        backup_path, 
+                        bucket_name, 
+                        aws_region,
+                        aws_access_key,
+                        aws_secret_key
+                    )
             else:
                 logging.warning("No S3 bucket specified. Use --bucket or set S3_BUCKET_NAME in aws_config.py")
                 logging.info(f"Backup created successfully at: {backup_path}")
@@ -399,7 +1566,7 @@ def main():
             logging.info(f"Backup created successfully at: {backup_path}")
             
         # Cleanup old backups
-        cleanup_old_backups(backup_path.parent, max_backups)
+        cleanup_old_backups(Path(args.output_dir) if args.output_dir else get_project_root(), max_backups)
     
 if __name__ == "__main__":
     main() 
\ No newline at end of file
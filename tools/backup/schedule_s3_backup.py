@@ -8,11 +8,17 @@ It uses a background process to monitor for changes and trigger backups.
 
 import os
 import sys
+import stat
 import time
 import datetime
 import argparse
 import subprocess
+import signal
 import hashlib
+import json
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 
@@ -33,8 +39,7 @@ try:
         AWS_SECRET_ACCESS_KEY,
         AWS_REGION,
         S3_BUCKET_NAME,
-        MAX_BACKUPS,
-        INCLUDE_VENV
+        MAX_BACKUPS
     )
     CONFIG_AVAILABLE = True
 except ImportError:
@@ -44,13 +49,73 @@ except ImportError:
     AWS_REGION = None
     S3_BUCKET_NAME = None
     MAX_BACKUPS = 5
-    INCLUDE_VENV = False
 
+# Use filesystem notifications instead of polling when watchdog is installed
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+# Events under these directories, and from backup archives or logs, never
+# wake the scheduler
+WATCH_IGNORE_DIRS = {
+    ".git", "__pycache__", "venv", ".venv", "backup_store", "node_modules",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache",
+}
+
+# Files are hashed in parallel; reads release the GIL, so more threads than
+# cores keep the disk queue full
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# (mtime, size) -> digest cache, so unchanged files are not re-read each cycle
+HASH_CACHE_PATH = Path.home() / ".trading_backup_hashcache.json"
+
+@functools.lru_cache(maxsize=1)
 def get_project_root():
     """Get the root directory of the trading system project"""
     # This script is in tools/backup, so go up two levels
     return Path(__file__).parent.parent.parent
 
+def _hash_file(full_path):
+    """
+    Hash one file in bounded memory
+    
+    Args:
+        full_path: Path of the file to hash
+        
+    Returns:
+        The BLAKE2b digest of the file, or None if it is unreadable
+    """
+    try:
+        with open(full_path, 'rb') as f:
+            return hashlib.file_digest(f, 'blake2b').digest()
+    except OSError as e:
+        logging.warning(f"Failed to read {full_path}: {e}")
+        return None
+
+def _load_hash_cache():
+    """Load the digest cache from the last run, or an empty one"""
+    try:
+        with open(HASH_CACHE_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:  # ValueError: unreadable JSON
+        logging.warning(f"Ignoring hash cache {HASH_CACHE_PATH}: {e}")
+        return {}
+
+def _save_hash_cache(entries):
+    """Atomically replace the digest cache"""
+    tmp_path = HASH_CACHE_PATH.with_name(HASH_CACHE_PATH.name + ".tmp")
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, HASH_CACHE_PATH)
+    except OSError as e:
+        logging.warning(f"Failed to save hash cache {HASH_CACHE_PATH}: {e}")
+
 def calculate_project_hash():
     """
     Calculate a hash of the project files to detect changes
@@ -58,85 +123,264 @@ def calculate_project_hash():
     Returns:
         A hash string representing the current state of the project
     """
-    project_root = get_project_root()
+    # Plain string paths throughout; a Path per tracked file costs more than its stat
+    root = str(get_project_root())
     
-    # Use git to get a list of all tracked files
+    # Use git to get a list of all tracked files; -z gives raw NUL-separated
+    # paths instead of quoting unusual names
     try:
-        git_files = subprocess.check_output(
-            ["git", "-C", str(project_root), "ls-files"], 
-            text=True
-        ).splitlines()
+        output = subprocess.check_output(
+            ["git", "-C", root, "ls-files", "-z"]
+        )
+        git_files = [os.fsdecode(name) for name in output.split(b'\x00') if name]
     except subprocess.CalledProcessError:
         logging.error("Failed to get git files. Is this a git repository?")
         return None
     
-    # Calculate a hash of the content of all tracked files
-    hasher = hashlib.md5()
-    
-    for file_path in sorted(git_files):
-        full_path = project_root / file_path
-        if full_path.is_file():
-            try:
-                with open(full_path, 'rb') as f:
-                    content = f.read()
-                    hasher.update(content)
-            except Exception as e:
-                logging.warning(f"Failed to read {file_path}: {e}")
-    
     # Also include sensitive files in the hash calculation
     sensitive_files = [".env", "client_secrets.json", "credentials.json"]
-    for file_name in sensitive_files:
-        file_path = project_root / file_name
-        if file_path.is_file():
-            try:
-                with open(file_path, 'rb') as f:
-                    content = f.read()
-                    hasher.update(content)
-            except Exception as e:
-                logging.warning(f"Failed to read {file_name}: {e}")
+    files = sorted(git_files) + sensitive_files
+    
+    join = os.path.join
+    
+    previous = _load_hash_cache()
+    entries = {}
+    stale = []
+    for file_path in files:
+        try:
+            st = os.stat(join(root, file_path))
+        except OSError:
+            continue  # Deleted but still in the index, or an absent sensitive file
+        if not stat.S_ISREG(st.st_mode):
+            continue  # Submodule checkouts and other non-files
+        entry = previous.get(file_path)
+        if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            entries[file_path] = entry
+        else:
+            stale.append((file_path, st))
+    
+    # Only files whose (mtime, size) changed are re-read
+    if stale:
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+            digests = executor.map(_hash_file, (join(root, f) for f, _ in stale))
+            for (file_path, st), digest in zip(stale, digests):
+                if digest is not None:
+                    entries[file_path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                                          "blake2b": digest.hex()}
+    
+    if entries != previous:
+        _save_hash_cache(entries)
+    
+    # Fold (path, digest) pairs into one project hash in sorted order, so
+    # renames are detected as well as edits
+    hasher = hashlib.blake2b()
+    for file_path in files:
+        entry = entries.get(file_path)
+        if entry is not None:
+            hasher.update(file_path.encode() + b'\x00' + bytes.fromhex(entry["blake2b"]))
     
     return hasher.hexdigest()
 
-def run_backup(bucket_name=None, region=None, access_key=None, secret_key=None):
-    """Run the backup script"""
-    backup_script = Path(__file__).parent / "backup_to_s3.py"
+def _watch_dirs(project_root):
+    """
+    Top-level directories of the project the watcher should cover
     
+    Directories named in WATCH_IGNORE_DIRS, and directories git ignores as a
+    whole, are left out so no watch is ever placed inside them.
+    
+    Args:
+        project_root: Project root directory
+        
+    Returns:
+        List of directory paths
+    """
+    root = str(project_root)
+    ignored = set(WATCH_IGNORE_DIRS)
     try:
-        cmd = [sys.executable, str(backup_script)]
+        # --directory reports a fully ignored directory as one "name/" entry
+        # instead of descending into it
+        output = subprocess.run(
+            ["git", "-C", root, "ls-files", "-z", "--others", "--ignored",
+             "--exclude-standard", "--directory"],
+            capture_output=True, check=True
+        ).stdout
+        for name in output.split(b'\x00'):
+            name = os.fsdecode(name).rstrip("/")
+            if name and "/" not in name:
+                ignored.add(name)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.warning(f"Could not list git-ignored directories: {e}")
+    
+    with os.scandir(root) as entries:
+        return [entry.path for entry in entries
+                if entry.is_dir(follow_symlinks=False) and entry.name not in ignored]
+
+if WATCHDOG_AVAILABLE:
+    class _ChangeHandler(FileSystemEventHandler):
+        """Set an event whenever a relevant file under the project changes"""
         
-        # Add command line arguments if provided
-        if bucket_name:
-            cmd.extend(["--bucket", bucket_name])
-        if region:
-            cmd.extend(["--region", region])
-        if access_key:
-            cmd.extend(["--access-key", access_key])
-        if secret_key:
-            cmd.extend(["--secret-key", secret_key])
+        def __init__(self, project_root, changed, observer):
+            self.project_root = str(project_root)
+            self.changed = changed
+            self.observer = observer
         
-        logging.info("Running backup...")
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True
-        )
+        def _relevant(self, path):
+            rel_path = os.path.relpath(os.fsdecode(path), self.project_root)
+            parts = rel_path.split(os.sep)
+            if WATCH_IGNORE_DIRS.intersection(parts):
+                return False
+            name = parts[-1]
+            return not (name.startswith("trading_system_backup") or name.endswith(".log"))
         
-        if result.returncode == 0:
+        def on_any_event(self, event):
+            # Opens and closes carry no change, and a directory "modified"
+            # event always accompanies an event for the file inside it
+            if event.event_type in ("opened", "closed", "closed_no_write"):
+                return
+            if event.is_directory and event.event_type == "modified":
+                return
+            paths = [event.src_path]
+            if getattr(event, "dest_path", ""):
+                paths.append(event.dest_path)
+            if not any(self._relevant(path) for path in paths):
+                return
+            # The root itself is watched non-recursively, so a new top-level
+            # directory needs a watch of its own
+            new_dir = paths[-1] if event.event_type in ("created", "moved") else None
+            if event.is_directory and new_dir and os.path.dirname(os.fsdecode(new_dir)) == self.project_root:
+                self.observer.schedule(self, os.fsdecode(new_dir), recursive=True)
+            self.changed.set()
+
+def start_watcher(project_root, changed):
+    """
+    Watch the project tree for changes
+    
+    Args:
+        project_root: Directory to watch
+        changed: threading.Event set on every relevant change
+        
+    Returns:
+        The running watchdog Observer, or None if watchdog is not available
+    """
+    if not WATCHDOG_AVAILABLE:
+        return None
+    observer = Observer()
+    handler = _ChangeHandler(project_root, changed, observer)
+    observer.schedule(handler, str(project_root), recursive=False)
+    for path in _watch_dirs(project_root):
+        observer.schedule(handler, path, recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+def run_backup(bucket_name=None, region=None, access_key=None, secret_key=None, isolated=False):
+    """
+    Run the backup script
+    
+    By default the backup runs in this process, so boto3 is imported and the
+    S3 client (credentials, pooled connections) is created once and reused
+    on every run. With `isolated`, each backup runs as a separate process.
+    
+    Args:
+        bucket_name: S3 bucket name
+        region: AWS region
+        access_key: AWS access key ID
+        secret_key: AWS secret access key
+        isolated: Run backup_to_s3.py as a subprocess instead
+        
+    Returns:
+        True if the backup succeeded
+    """
+    args = []
+    
+    # Add command line arguments if provided
+    if bucket_name:
+        args.extend(["--bucket", bucket_name])
+    if region:
+        args.extend(["--region", region])
+    if access_key:
+        args.extend(["--access-key", access_key])
+    if secret_key:
+        args.extend(["--secret-key", secret_key])
+    
+    logging.info("Running backup...")
+    
+    try:
+        if isolated:
+            returncode = _run_backup_process(args)
+        else:
+            # Imported on first use so --isolated and the daemon launcher
+            # never load boto3
+            import backup_to_s3
+            try:
+                backup_to_s3.main(args)
+                returncode = 0
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        
+        if returncode == 0:
             logging.info("Backup completed successfully")
-            for line in result.stdout.splitlines():
-                if line.strip():  # Only log non-empty lines
-                    logging.info(f"  {line}")
         else:
-            logging.error("Backup failed")
-            logging.error(f"Error: {result.stderr}")
+            logging.error(f"Backup failed (exit code {returncode})")
             
-        return result.returncode == 0
+        return returncode == 0
     
     except Exception as e:
         logging.error(f"Failed to run backup: {e}")
+        logging.exception("Stack trace:")
+        return False
+
+def _run_backup_process(args):
+    """Run backup_to_s3.py as a subprocess, logging its output, and return its exit code"""
+    backup_script = Path(__file__).parent / "backup_to_s3.py"
+    cmd = [sys.executable, str(backup_script), *args]
+    
+    # Log the backup's output as it runs instead of buffering all of it;
+    # stderr (tracebacks) is merged in so it can't fill an unread pipe
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
+    ) as process:
+        for line in process.stdout:
+            if line.strip():  # Only log non-empty lines
+                logging.info(f"  {line.rstrip()}")
+        return process.wait()
+
+def start_signal_listener(forced, changed):
+    """
+    Turn SIGUSR1 into a request for an immediate backup
+    
+    The signal is blocked and received with sigwait() on a helper thread:
+    Event.set() is not safe inside a Python signal handler, which can run
+    while the main thread holds the event's lock in Event.wait().
+    
+    Args:
+        forced: threading.Event set when a backup is requested
+        changed: threading.Event also set, to wake a watchdog wait
+        
+    Returns:
+        True if the listener is running (not available on Windows)
+    """
+    if not hasattr(signal, "pthread_sigmask"):
         return False
+    
+    # Threads inherit the mask, so block it before any other thread starts
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})
+    
+    def _listen():
+        while True:
+            signal.sigwait({signal.SIGUSR1})
+            forced.set()
+            changed.set()
+    
+    threading.Thread(target=_listen, name="backup-sigusr1", daemon=True).start()
+    return True
 
-def monitor_changes(interval_minutes=60, change_detection=True, bucket_name=None, region=None, access_key=None, secret_key=None):
+def monitor_changes(interval_minutes=60, change_detection=True, bucket_name=None, region=None, access_key=None, secret_key=None,
+                    isolated=False):
     """
     Monitor the project for changes and run backups
     
@@ -147,6 +391,7 @@ def monitor_changes(interval_minutes=60, change_detection=True, bucket_name=None
         region: AWS region
         access_key: AWS access key ID
         secret_key: AWS secret access key
+        isolated: Run each backup in a separate process
     """
     logging.info(f"Starting S3 backup scheduler")
     logging.info(f"  Interval: {interval_minutes} minutes")
@@ -157,17 +402,41 @@ def monitor_changes(interval_minutes=60, change_detection=True, bucket_name=None
     last_backup_time = 0
     last_hash = calculate_project_hash() if change_detection else None
     
+    # `kill -USR1 <pid>` runs a backup right away
+    forced = threading.Event()
+    changed = threading.Event()
+    if start_signal_listener(forced, changed):
+        logging.info(f"  Send SIGUSR1 to PID {os.getpid()} to back up immediately")
+    
+    # With watchdog, sleep until files actually change instead of rehashing
+    # the project every minute
+    observer = start_watcher(get_project_root(), changed) if change_detection else None
+    if observer is not None:
+        logging.info("  Watching for file changes with watchdog")
+    
     try:
         while True:
             current_time = time.time()
             elapsed_minutes = (current_time - last_backup_time) / 60
             
-            # Check if enough time has passed since the last backup
-            if elapsed_minutes >= interval_minutes:
+            # Check if a backup was requested or enough time has passed since the last one
+            if forced.is_set() or elapsed_minutes >= interval_minutes:
                 run_backup_now = True
                 
+                if forced.is_set():
+                    logging.info("Backup requested with SIGUSR1, running backup")
+                    forced.clear()
+                    changed.clear()
+                    if change_detection:
+                        last_hash = calculate_project_hash()
+                
+                # Nothing was touched since the last check
+                elif observer is not None and not changed.is_set():
+                    run_backup_now = False
+                
                 # If change detection is enabled, check if the project has changed
-                if change_detection:
+                elif change_detection:
+                    changed.clear()
                     current_hash = calculate_project_hash()
                     if current_hash == last_hash:
                         logging.info("No changes detected, skipping backup")
@@ -177,16 +446,26 @@ def monitor_changes(interval_minutes=60, change_detection=True, bucket_name=None
                         last_hash = current_hash
                 
                 if run_backup_now:
-                    success = run_backup(bucket_name, region, access_key, secret_key)
+                    success = run_backup(bucket_name, region, access_key, secret_key, isolated)
                     if success:
                         last_backup_time = time.time()
             
-            # Sleep for a while before checking again
-            # Use a shorter sleep time to be more responsive to changes
-            time.sleep(60)  # Check every minute
+            # Sleep exactly until the interval has passed; SIGUSR1 cuts any wait short
+            remaining = interval_minutes * 60 - (time.time() - last_backup_time)
+            if remaining > 0:
+                forced.wait(timeout=remaining)
+            elif observer is not None:
+                changed.wait(timeout=interval_minutes * 60)
+            else:
+                # Without watchdog, poll for changes (or retry a failed backup) every minute
+                forced.wait(timeout=60)
             
     except KeyboardInterrupt:
         logging.info("Backup scheduler stopped by user")
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
 
 def main():
     parser = argparse.ArgumentParser(description='Schedule automatic backups of the trading system to AWS S3')
@@ -196,6 +475,9 @@ def main():
                         help='Disable change detection (backup at fixed intervals)')
     parser.add_argument('--daemon', action='store_true',
                         help='Run as a background daemon process')
+    parser.add_argument('--isolated', action='store_true',
+                        help='Run each backup in a separate process')
+    parser.add_argument('--detached', action='store_true', help=argparse.SUPPRESS)
     parser.add_argument('--bucket', help='S3 bucket name')
     parser.add_argument('--region', help='AWS region (e.g., us-east-1)')
     parser.add_argument('--access-key', help='AWS access key ID')
@@ -209,34 +491,26 @@ def main():
     aws_access_key = args.access_key or AWS_ACCESS_KEY_ID
     aws_secret_key = args.secret_key or AWS_SECRET_ACCESS_KEY
     
-    if args.daemon:
-        # Fork the process to run in the background
+    if args.daemon and not args.detached:
+        # Start a fresh interpreter in its own session rather than forking
+        # this one, so no threads or imported state are carried over
         try:
-            pid = os.fork()
-            if pid > 0:
-                # Exit the parent process
-                logging.info(f"S3 backup scheduler started in background (PID: {pid})")
-                sys.exit(0)
+            child = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--detached"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
         except OSError as e:
-            logging.error(f"Failed to fork: {e}")
+            logging.error(f"Failed to start background process: {e}")
             sys.exit(1)
-        
-        # Detach from the terminal
-        os.setsid()
-        
-        # Change working directory
+        logging.info(f"S3 backup scheduler started in background (PID: {child.pid})")
+        sys.exit(0)
+    
+    if args.detached:
+        # The log file is already open, so the working directory can go
         os.chdir('/')
-        
-        # Redirect standard file descriptors
-        sys.stdout.flush()
-        sys.stderr.flush()
-        
-        with open('/dev/null', 'r') as f:
-            os.dup2(f.fileno(), sys.stdin.fileno())
-        with open('/dev/null', 'a+') as f:
-            os.dup2(f.fileno(), sys.stdout.fileno())
-        with open('/dev/null', 'a+') as f:
-            os.dup2(f.fileno(), sys.stderr.fileno())
     
     # Start monitoring for changes
     monitor_changes(
@@ -245,7 +519,8 @@ def main():
         bucket_name,
         aws_region,
         aws_access_key,
-        aws_secret_key
+        aws_secret_key,
+        args.isolated
     )
 
 if __name__ == "__main__":
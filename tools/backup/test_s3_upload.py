@@ -75,11 +75,16 @@ def upload_to_s3(file_path, bucket_name, aws_region=None, aws_access_key=None, a
         logging.info(f"Uploading {file_name} to S3...")
         s3_key = f"test/{file_name}"
         
-        s3_client.upload_file(
-            str(file_path),
-            bucket_name,
-            s3_key
-        )
+        # The test file is a few bytes, so a single PutObject; it carries the
+        # same encryption header as real backups so bucket policies that
+        # require it are exercised too
+        with open(file_path, "rb") as f:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=s3_key,
+                Body=f,
+                ServerSideEncryption='AES256'
+            )
         
         logging.info(f"Successfully uploaded to S3: {file_name}")
         
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Candle Insert Benchmark
+
+Times limex_data.store_market_data (one SQLAlchemy Core executemany) against
+pandas DataFrame.to_sql(method='multi') for a batch of synthetic candles.
+Runs in a temporary directory, since limex_data creates ./database.db on import.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import text
+
+def make_candles(n):
+    """Build n synthetic hourly candles in the shape the Limex API returns"""
+    start = pd.Timestamp("2024-01-01")
+    return [
+        {
+            "timestamp": (start + pd.Timedelta(hours=i)).isoformat(),
+            "open": 100.0 + i % 7,
+            "high": 101.0 + i % 7,
+            "low": 99.0 + i % 7,
+            "close": 100.5 + i % 7,
+            "volume": float(1000 + i % 13)
+        }
+        for i in range(n)
+    ]
+
+def best_of(repeat, setup, fn):
+    """Best wall time of `repeat` runs of fn, calling setup before each"""
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark candle inserts into SQLite')
+    parser.add_argument('--rows', type=int, default=50000,
+                        help='Number of candles per insert (default: 50000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per method; the best is reported (default: 3)')
+    parser.add_argument('--chunksize', type=int, default=500,
+                        help='Rows per statement for to_sql (default: 500)')
+    
+    args = parser.parse_args()
+    
+    project_root = Path(__file__).resolve().parent.parent.parent
+    sys.path.insert(0, str(project_root))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        import limex_data
+        
+        candles = make_candles(args.rows)
+        frame = pd.DataFrame({
+            "symbol": "BENCH",
+            "timestamp": [c["timestamp"] for c in candles],
+            "open_price": [c["open"] for c in candles],
+            "high_price": [c["high"] for c in candles],
+            "low_price": [c["low"] for c in candles],
+            "close_price": [c["close"] for c in candles],
+            "volume": [c["volume"] for c in candles]
+        })
+        
+        def clear():
+            with limex_data.engine.begin() as conn:
+                conn.execute(text("DELETE FROM market_data"))
+        
+        def to_sql():
+            frame.to_sql("market_data", limex_data.engine, if_exists="append", index=False,
+                         method="multi", chunksize=args.chunksize)
+        
+        core = best_of(args.repeat, clear, lambda: limex_data.store_market_data(candles, "BENCH"))
+        multi = best_of(args.repeat, clear, to_sql)
+        
+        print(f"SQLite {sqlite3.sqlite_version}, pandas {pd.__version__}, {args.rows} rows, best of {args.repeat}")
+        print(f"  store_market_data (Core executemany): {core:.3f} s")
+        print(f"  to_sql(method='multi', chunksize={args.chunksize}): {multi:.3f} s")
+        
+        limex_data.engine.dispose()
+
+if __name__ == "__main__":
+    main()
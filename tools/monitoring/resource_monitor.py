@@ -4,12 +4,17 @@ Resource Monitor for Trading System Agents
 
 This script monitors CPU and RAM usage of specified processes or all Python processes.
 It logs the data and provides real-time feedback to help determine if a GPU is needed.
+
+CPU figures are measured over the time since the previous sample. One
+baseline sample is taken, and not logged, one interval before the first
+iteration; a process that starts later shows 0.0% CPU in its first sample.
 """
 
 import os
 import sys
 import time
 import datetime
+import heapq
 import psutil
 import argparse
 import logging
@@ -29,7 +34,22 @@ logging.basicConfig(
     ]
 )
 
-def get_process_info(process):
+# On Linux, CPU time and RSS come from a single read of /proc/<pid>/stat
+# instead of psutil's several /proc reads and Python-level wrappers
+PROC_STAT_AVAILABLE = sys.platform.startswith('linux') and os.path.exists('/proc/self/stat')
+if PROC_STAT_AVAILABLE:
+    CLK_TCK = os.sysconf('SC_CLK_TCK')
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+def _read_proc_file(path):
+    """Read a /proc file in one system call"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, 16384)
+    finally:
+        os.close(fd)
+
+def get_process_info(process, name):
     """Get CPU and memory usage for a process"""
     try:
         with process.oneshot():
@@ -40,23 +60,162 @@ def get_process_info(process):
             memory_info = process.memory_info()
             memory_mb = memory_info.rss / (1024 * 1024)
             
-            # Get process name and command line
-            name = process.name()
-            try:
-                cmdline = ' '.join(process.cmdline())
-            except (psutil.AccessDenied, psutil.ZombieProcess):
-                cmdline = "Access Denied"
-                
             return {
                 'pid': process.pid,
                 'name': name,
                 'cpu_percent': cpu_percent,
-                'memory_mb': memory_mb,
-                'cmdline': cmdline
+                'memory_mb': memory_mb
             }
     except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
         return None
 
+def get_process_info_linux(pid, name, cpu_ticks):
+    """
+    Get CPU and memory usage for a process from /proc/<pid>/stat
+    
+    CPU usage is the change in utime + stime since the previous call for the
+    same PID, as a percentage of the wall time in between (0.0 on the first
+    call, like psutil's cpu_percent(interval=None)).
+    
+    Args:
+        pid: Process ID
+        name: Cached process name
+        cpu_ticks: Dict of pid -> (CPU ticks, monotonic time) from the last call, updated in place
+    """
+    try:
+        data = _read_proc_file(f"/proc/{pid}/stat")
+    except OSError:
+        return None  # Exited since the PID list was read
+    
+    # The command name in field 2 may contain spaces and parentheses; fields
+    # after the last ')' start at field 3, so utime (14), stime (15) and
+    # rss (24, in pages) are at 11, 12 and 21
+    fields = data.rsplit(b')', 1)[1].split()
+    ticks = int(fields[11]) + int(fields[12])
+    now = time.monotonic()
+    
+    cpu_percent = 0.0
+    previous = cpu_ticks.get(pid)
+    if previous is not None and now > previous[1]:
+        cpu_percent = max(ticks - previous[0], 0) / CLK_TCK / (now - previous[1]) * 100
+    cpu_ticks[pid] = (ticks, now)
+    
+    return {
+        'pid': pid,
+        'name': name,
+        'cpu_percent': cpu_percent,
+        'memory_mb': int(fields[21]) * PAGE_SIZE / (1024 * 1024)
+    }
+
+def get_system_usage_linux(cpu_state):
+    """
+    Get system-wide CPU and memory usage from /proc/stat and /proc/meminfo
+    
+    Matches psutil: CPU usage is the non-idle share of the ticks since the
+    previous call (0.0 on the first call), memory usage is the share of
+    MemTotal that is not MemAvailable.
+    
+    Args:
+        cpu_state: Dict holding the (busy, total) ticks of the last call, updated in place
+        
+    Returns:
+        Tuple of (cpu_percent, memory_percent)
+    """
+    # First line: "cpu user nice system idle iowait irq softirq steal guest guest_nice";
+    # guest time is already counted in user and nice, so it is left out
+    ticks = [int(field) for field in _read_proc_file("/proc/stat").split(b'\n', 1)[0].split()[1:9]]
+    total = sum(ticks)
+    busy = total - ticks[3] - ticks[4]
+    
+    cpu_percent = 0.0
+    previous = cpu_state.get('cpu')
+    if previous is not None and total > previous[1]:
+        cpu_percent = max(busy - previous[0], 0) / (total - previous[1]) * 100
+    cpu_state['cpu'] = (busy, total)
+    
+    # MemTotal and MemAvailable are the first and third lines, so the scan
+    # normally stops early
+    meminfo = {}
+    for line in _read_proc_file("/proc/meminfo").splitlines():
+        key, value = line.split(b':', 1)
+        meminfo[key] = int(value.split()[0])
+        if b'MemAvailable' in meminfo:
+            break
+    mem_total = meminfo[b'MemTotal']
+    mem_available = meminfo.get(b'MemAvailable')
+    if mem_available is None:  # Kernels before 3.14
+        mem_available = meminfo[b'MemFree'] + meminfo.get(b'Buffers', 0) + meminfo.get(b'Cached', 0)
+    memory_percent = (mem_total - mem_available) / mem_total * 100
+    
+    return cpu_percent, memory_percent
+
+def get_system_usage(cpu_state):
+    """
+    Get system-wide CPU and memory usage as percentages
+    
+    Args:
+        cpu_state: Dict of CPU counters from the last call, updated in place
+        
+    Returns:
+        Tuple of (cpu_percent, memory_percent)
+    """
+    if PROC_STAT_AVAILABLE:
+        return get_system_usage_linux(cpu_state)
+    # psutil keeps its own counters between calls
+    return psutil.cpu_percent(), psutil.virtual_memory().percent
+
+def refresh_processes(tracked, process_filter=None):
+    """
+    Bring the cache of monitored processes in line with the running PIDs
+    
+    Each PID is looked at once, when it first appears: its name is read and
+    the filter applied, and the result is kept for as long as the PID stays
+    alive (a PID would have to be reused within one interval to be
+    misclassified). Rejected PIDs are cached as None, so they cost nothing
+    on later iterations.
+    
+    Args:
+        tracked: Dict of pid -> (Process, name) or None, updated in place
+        process_filter: Function to filter processes (e.g., lambda p: 'python' in p.name())
+    """
+    pids = set(psutil.pids())
+    for pid in tracked.keys() - pids:
+        del tracked[pid]
+    
+    for pid in pids - tracked.keys():
+        try:
+            process = psutil.Process(pid)
+            if process_filter is None or process_filter(process):
+                tracked[pid] = (process, process.name())
+            else:
+                tracked[pid] = None
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            tracked[pid] = None
+
+def sample_processes(tracked, cpu_ticks):
+    """
+    Sample CPU and memory usage of the tracked processes
+    
+    Args:
+        tracked: Dict of pid -> (Process, name) or None, from refresh_processes
+        cpu_ticks: Dict of pid -> (CPU ticks, monotonic time), updated in place
+        
+    Returns:
+        List of process info dicts
+    """
+    processes = []
+    for pid, entry in tracked.items():
+        if entry is not None:
+            if PROC_STAT_AVAILABLE:
+                info = get_process_info_linux(pid, entry[1], cpu_ticks)
+            else:
+                info = get_process_info(*entry)
+            if info:
+                processes.append(info)
+    for pid in cpu_ticks.keys() - tracked.keys():
+        del cpu_ticks[pid]
+    return processes
+
 def monitor_processes(process_filter=None, interval=5, duration=None):
     """
     Monitor system processes and log their resource usage
@@ -78,8 +237,18 @@ def monitor_processes(process_filter=None, interval=5, duration=None):
     
     start_time = time.time()
     iteration = 0
+    tracked = {}  # pid -> (Process, name), or None for processes the filter rejected
+    cpu_ticks = {}  # pid -> (CPU ticks, time) of the last /proc sample
+    system_cpu = {}  # System-wide CPU counters of the last sample
     
     try:
+        # CPU usage is a delta against the previous sample, so take a baseline
+        # first; otherwise every figure in the first iteration reads 0.0
+        refresh_processes(tracked, process_filter)
+        sample_processes(tracked, cpu_ticks)
+        get_system_usage(system_cpu)
+        time.sleep(interval)
+        
         while True:
             iteration += 1
             current_time = time.time()
@@ -88,36 +257,35 @@ def monitor_processes(process_filter=None, interval=5, duration=None):
             if duration and elapsed > duration:
                 break
                 
-            # Get all processes
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                if process_filter is None or process_filter(proc):
-                    info = get_process_info(proc)
-                    if info:
-                        processes.append(info)
+            # Sample the cached processes; only new PIDs are looked up
+            refresh_processes(tracked, process_filter)
+            processes = sample_processes(tracked, cpu_ticks)
             
-            # Sort by CPU usage
-            processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
+            # Top 10 by CPU usage; a bounded heap instead of sorting every process
+            top_processes = heapq.nlargest(10, processes, key=lambda x: x['cpu_percent'])
             
             # Log system-wide stats
-            cpu_percent = psutil.cpu_percent()
-            memory_percent = psutil.virtual_memory().percent
+            cpu_percent, memory_percent = get_system_usage(system_cpu)
             
-            logging.info(f"Iteration {iteration} - System CPU: {cpu_percent:.1f}%, "
-                        f"Memory: {memory_percent:.1f}%")
+            # One multi-line record per iteration: a single pass through the
+            # handlers instead of one per line
+            lines = [f"Iteration {iteration} - System CPU: {cpu_percent:.1f}%, "
+                     f"Memory: {memory_percent:.1f}%"]
             
             # Log top processes
-            for i, proc in enumerate(processes[:10]):  # Top 10 processes
-                logging.info(f"  {i+1}. PID {proc['pid']} ({proc['name']}): "
-                           f"CPU {proc['cpu_percent']:.1f}%, "
-                           f"Memory {proc['memory_mb']:.1f} MB")
+            for i, proc in enumerate(top_processes):
+                lines.append(f"  {i+1}. PID {proc['pid']} ({proc['name']}): "
+                             f"CPU {proc['cpu_percent']:.1f}%, "
+                             f"Memory {proc['memory_mb']:.1f} MB")
             
             # Calculate totals for filtered processes
             if processes:
                 total_cpu = sum(p['cpu_percent'] for p in processes)
                 total_memory_mb = sum(p['memory_mb'] for p in processes)
-                logging.info(f"Total for monitored processes: CPU {total_cpu:.1f}%, "
-                           f"Memory {total_memory_mb:.1f} MB")
+                lines.append(f"Total for monitored processes: CPU {total_cpu:.1f}%, "
+                             f"Memory {total_memory_mb:.1f} MB")
+            
+            logging.info("\n".join(lines))
             
             time.sleep(interval)
             
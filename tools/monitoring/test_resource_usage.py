@@ -10,9 +10,22 @@ import os
 import sys
 import time
 import subprocess
+import threading
 import argparse
 from pathlib import Path
 
+def relay_output(stream, prefix):
+    """Print a child process's output line by line as it arrives"""
+    for line in stream:
+        print(f"{prefix}{line}", end='', flush=True)
+    stream.close()
+
+def start_relay(process, prefix):
+    """Drain a child's merged stdout/stderr on a thread, so its pipe never fills up"""
+    thread = threading.Thread(target=relay_output, args=(process.stdout, prefix), daemon=True)
+    thread.start()
+    return thread
+
 def run_agent_with_monitoring(agent_script, duration=300, interval=5):
     """
     Run an agent script while monitoring its resource usage
@@ -31,24 +44,25 @@ def run_agent_with_monitoring(agent_script, duration=300, interval=5):
     # Get the directory of this script
     current_dir = Path(__file__).parent
     
-    # Start the agent in a separate process
+    # Start the agent in a separate process; its output is relayed live
+    # (unbuffered, -u) rather than collected until the end
     print(f"Starting agent: {agent_path}")
     agent_process = subprocess.Popen(
-        [sys.executable, str(agent_path)],
+        [sys.executable, "-u", str(agent_path)],
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
     )
+    agent_relay = start_relay(agent_process, "[agent] ")
     
     # Give the agent a moment to start
     time.sleep(2)
     
     if agent_process.poll() is not None:
-        # Agent failed to start
-        stdout, stderr = agent_process.communicate()
-        print(f"Error: Agent failed to start")
-        print(f"STDOUT: {stdout}")
-        print(f"STDERR: {stderr}")
+        # Agent failed to start; its output has been printed above
+        agent_relay.join()
+        print(f"Error: Agent failed to start (exit code {agent_process.returncode})")
         return
     
     # Start the resource monitor
@@ -63,21 +77,16 @@ def run_agent_with_monitoring(agent_script, duration=300, interval=5):
             "--duration", str(duration)
         ],
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
     )
+    monitor_relay = start_relay(monitor_process, "[monitor] ")
     
     try:
         # Wait for the monitoring to complete
-        monitor_stdout, monitor_stderr = monitor_process.communicate()
-        
-        # Print monitoring output
-        print("\nResource Monitoring Results:")
-        print(monitor_stdout)
-        
-        if monitor_stderr:
-            print("Monitoring Errors:")
-            print(monitor_stderr)
+        monitor_process.wait()
+        print("\nResource monitoring finished")
         
     except KeyboardInterrupt:
         print("Test interrupted by user")
@@ -99,15 +108,9 @@ def run_agent_with_monitoring(agent_script, duration=300, interval=5):
             except subprocess.TimeoutExpired:
                 monitor_process.kill()
     
-    # Get agent output
-    agent_stdout, agent_stderr = agent_process.communicate()
-    
-    print("\nAgent Output:")
-    print(agent_stdout)
-    
-    if agent_stderr:
-        print("Agent Errors:")
-        print(agent_stderr)
+    # Let the relays print whatever output is left
+    agent_relay.join(timeout=5)
+    monitor_relay.join(timeout=5)
     
     print("\nTest complete. Check the logs directory for detailed resource usage data.")
 